@@ -11,16 +11,10 @@ import streamlit as st
 # Import configuration
 from config import configure_page
 
-# Import services
-from services import extract_text_from_file
-
-# Import UI components
+# Import UI components; services load their heavy dependencies on first use
 from ui.main_page import process_cvs, display_results
 from ui.sidebar import render_sidebar
 
-# Import utilities
-from utils.helpers import convert_text_to_job_criteria_json, update_job_criteria_in_azure
-
 
 def main():
     """Main application entry point."""
@@ -33,14 +27,14 @@ def main():
     # Initialize session state if not exists
     if 'analysis_completed' not in st.session_state:
         st.session_state['analysis_completed'] = False
-        st.session_state['results'] = []
-        st.session_state['thread_ids'] = []
+        # Results live in the results store; the session only keeps the run ID
+        st.session_state['run_id'] = None
 
     # Render sidebar and get user inputs
     uploaded_files, process_button = render_sidebar()
 
     # Main content area
-    if not uploaded_files:
+    if not uploaded_files and not st.session_state.get('analysis_completed'):
         st.info(
             "Please upload one or more CV files from the sidebar to begin analysis.")
 
@@ -84,17 +78,15 @@ def main():
     elif process_button or st.session_state.get('analysis_completed'):
         # Process CVs if button was clicked or we already have results
         if not st.session_state['analysis_completed'] and process_button:
-            # Process the uploaded CVs
-            results = process_cvs(uploaded_files)
+            # Submit the uploaded CVs; the job runs in the background
+            run_id = process_cvs(uploaded_files)
 
-            # Store results in session state
-            st.session_state['results'] = results
-            st.session_state['thread_ids'] = [
-                r.get("Thread ID", "") for r in results]
+            # Store the run ID in session state
+            st.session_state['run_id'] = run_id
             st.session_state['analysis_completed'] = True
 
         # Display the results
-        display_results(st.session_state.get('results', []))
+        display_results(st.session_state.get('run_id'))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+"""
+Benchmark harness for the CV Analysis Tool.
+Contains a local stub of the FastAgent and Azure OpenAI APIs, a corpus
+generator and reproducible benchmarks of the analysis hot paths.
+"""
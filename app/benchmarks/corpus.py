@@ -0,0 +1,147 @@
+"""
+Benchmark corpus generator.
+
+Builds any number of distinct CV files from the sample resumes in app/resumes.
+Each variant gets its own generated project section, so its text misses the
+extraction cache and is not grouped with the other variants by de-duplication,
+like a new upload would; benchmarks disable the analysis cache.
+
+Usage:
+    python -m benchmarks.corpus --count 200 --output-dir /tmp/cv_corpus
+"""
+
+import argparse
+import io
+import os
+import random
+import zipfile
+from typing import List, Tuple
+
+from cli import find_cv_files
+
+DEFAULT_SOURCE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resumes")
+
+# Words of the generated project sections; each variant draws its own sequence
+_VOCABULARY = (
+    "python java sql spark kafka airflow docker kubernetes terraform azure aws gcp "
+    "react typescript django flask fastapi postgres redis elasticsearch pandas numpy "
+    "pytorch tensorflow mlops etl pipelines dashboards reporting migration platform "
+    "api microservices monitoring security compliance onboarding mentoring hiring "
+    "budget roadmap stakeholders analytics forecasting pricing logistics payments "
+    "billing search recommendations experimentation testing automation performance "
+    "scalability reliability latency throughput caching streaming batch warehouse"
+).split()
+
+# Generated words per variant; the sample CVs are about 70 words long, so two
+# variants of the same CV share well under DEDUP_THRESHOLD of their shingles
+_PROJECT_WORDS = 80
+_WORDS_PER_LINE = 10
+
+
+def _project_lines(index: int) -> List[str]:
+    """Deterministic, variant-specific text lines appended to the index-th CV."""
+    rng = random.Random(index)
+    words = [rng.choice(_VOCABULARY) for _ in range(_PROJECT_WORDS)]
+    return [f"Reference number {index:06d}. Project highlights:"] + [
+        " ".join(words[i:i + _WORDS_PER_LINE]) for i in range(0, len(words), _WORDS_PER_LINE)]
+
+
+def _pdf_variant(data: bytes, lines: List[str]) -> bytes:
+    # Add a page with the lines so the extracted text differs, not just the file bytes
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = PdfWriter(clone_from=PdfReader(io.BytesIO(data)))
+    last_page = writer.pages[-1]
+    page = writer.add_blank_page(float(last_page.mediabox.width), float(last_page.mediabox.height))
+    page[NameObject("/Resources")] = DictionaryObject({
+        NameObject("/Font"): DictionaryObject({
+            NameObject("/F1"): DictionaryObject({
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica")
+            })
+        })
+    })
+    # The lines only contain letters, digits, spaces and punctuation that needs no escaping
+    text = " T* ".join(f"({line}) Tj" for line in lines)
+    content = DecodedStreamObject()
+    content.set_data(f"BT /F1 11 Tf 14 TL 72 {float(page.mediabox.height) - 72} Td {text} ET".encode("ascii"))
+    page.replace_contents(content)
+
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def _docx_variant(data: bytes, lines: List[str]) -> bytes:
+    # Append paragraphs to the document body so the extracted text differs too
+    paragraphs = "".join(f"<w:p><w:r><w:t>{line}</w:t></w:r></w:p>" for line in lines)
+    source = zipfile.ZipFile(io.BytesIO(data))
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename == "word/document.xml":
+                content = content.replace(
+                    b"</w:body>", f"{paragraphs}</w:body>".encode("utf-8"), 1)
+            target.writestr(item, content)
+    return output.getvalue()
+
+
+def _text_variant(data: bytes, lines: List[str]) -> bytes:
+    return data + ("\n\n" + "\n".join(lines) + "\n").encode("utf-8")
+
+
+def make_variant(path: str, index: int) -> Tuple[str, bytes]:
+    """Return the file name and bytes of the index-th variant of a sample CV."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    stem, ext = os.path.splitext(os.path.basename(path))
+    lines = _project_lines(index)
+    ext = ext.lower()
+    if ext == ".pdf":
+        data = _pdf_variant(data, lines)
+    elif ext == ".docx":
+        data = _docx_variant(data, lines)
+    else:
+        data = _text_variant(data, lines)
+
+    return f"{stem}_{index:06d}{ext}", data
+
+
+def generate_corpus(count: int, source_dir: str = DEFAULT_SOURCE_DIR) -> List[Tuple[str, bytes]]:
+    """Return ``count`` distinct (file name, bytes) CVs, cycling through the samples."""
+    sources = find_cv_files(source_dir, recursive=True)
+    if not sources:
+        raise ValueError(f"No sample CVs found in {source_dir}")
+    return [make_variant(sources[i % len(sources)], i) for i in range(count)]
+
+
+def write_corpus(count: int, output_dir: str, source_dir: str = DEFAULT_SOURCE_DIR) -> List[str]:
+    """Write a generated corpus to a directory and return the file paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, data in generate_corpus(count, source_dir):
+        path = os.path.join(output_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a benchmark CV corpus.")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--source-dir", default=DEFAULT_SOURCE_DIR)
+    args = parser.parse_args()
+
+    paths = write_corpus(args.count, args.output_dir, args.source_dir)
+    print(f"Wrote {len(paths)} CVs to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
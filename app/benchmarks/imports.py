@@ -0,0 +1,95 @@
+"""
+Import-time benchmark of the app's entry points.
+
+Imports each module in a fresh interpreter several times and reports the median
+wall time, the slowest imports (from ``python -X importtime``) and which heavy
+third-party packages were loaded, so cold-start regressions are easy to spot.
+
+Usage:
+    cd app
+    python -m benchmarks.imports --modules app cli --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that should only load when a feature needs them
+HEAVY_MODULES = ("pandas", "numpy", "pypdf", "docx2txt", "requests", "httpx",
+                 "azure.storage.blob", "azure.core")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed,
+                   "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def _run(module: str, importtime: bool = False) -> Tuple[Dict[str, Any], str]:
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)]
+    completed = subprocess.run(command, cwd=APP_DIR, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def slowest_imports(importtime_output: str, count: int = 10) -> List[Tuple[str, int]]:
+    """Parse ``-X importtime`` output into the (module, cumulative microseconds) pairs that took longest."""
+    timings = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings.append((name.strip(), int(cumulative)))
+    return sorted(timings, key=lambda item: item[1], reverse=True)[:count]
+
+
+def bench_module(module: str, repeat: int) -> Dict[str, Any]:
+    """Median import time of a module in fresh interpreters, with its heaviest imports."""
+    samples = [_run(module)[0] for _ in range(max(1, repeat))]
+    probe, importtime_output = _run(module, importtime=True)
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(sample["seconds"] for sample in samples) * 1000, 1),
+        "min_ms": round(min(sample["seconds"] for sample in samples) * 1000, 1),
+        "heavy_modules_loaded": probe["loaded"],
+        "slowest_imports": [{"module": name, "cumulative_ms": round(us / 1000, 1)}
+                            for name, us in slowest_imports(importtime_output)]
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the app's entry points.")
+    parser.add_argument("--modules", nargs="+", default=["app", "cli"],
+                        help="Modules to import, relative to the app directory")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Fresh interpreters per module")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = [bench_module(module, args.repeat) for module in args.modules]
+    for result in results:
+        print(f"{result['module']}: median {result['median_ms']} ms, min {result['min_ms']} ms")
+        print(f"  heavy modules loaded: {', '.join(result['heavy_modules_loaded']) or 'none'}")
+        for item in result["slowest_imports"][:5]:
+            print(f"  {item['cumulative_ms']:>8} ms  {item['module']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Reproducible benchmarks of text extraction, CV analysis, background analysis
+jobs and summarization.
+
+Starts the stub API server, generates a corpus from app/resumes and measures
+throughput, p50/p95 latency and peak Python memory (tracemalloc) per stage for
+each batch size. Results are printed as a table and optionally written as JSON
+so runs can be compared.
+
+Usage:
+    cd app
+    python -m benchmarks.run --sizes 10 50 100 --latency 0.2 --output bench.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from benchmarks.stub_server import StubConfig, StubServer
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Linearly interpolated percentile of the values (pct in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def measure(fn: Callable[[], Any]) -> Tuple[Any, float, int]:
+    """Run fn and return its result, wall time in seconds and peak traced memory in bytes."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _stage_result(stage: str, size: int, elapsed: float, peak: int,
+                  latencies: List[float], errors: int = 0) -> Dict[str, Any]:
+    return {
+        "stage": stage,
+        "batch_size": size,
+        "seconds": round(elapsed, 4),
+        "throughput_per_s": round(size / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        "peak_memory_mb": round(peak / (1024 * 1024), 2),
+        "errors": errors
+    }
+
+
+def bench_extraction(files: List) -> List[Dict[str, Any]]:
+    """Batch extraction throughput, and per-file latency of sequential extraction."""
+    from services.text_extraction import (
+        clear_extraction_cache,
+        extract_text_from_file,
+        extract_texts_from_files,
+        is_extraction_failure
+    )
+
+    clear_extraction_cache()
+    texts, elapsed, peak = measure(lambda: extract_texts_from_files(files))
+    batch = _stage_result("extract_batch", len(files), elapsed, peak, [],
+                          errors=sum(is_extraction_failure(text) for text in texts))
+
+    clear_extraction_cache()
+    latencies = []
+
+    def extract_each():
+        for uploaded_file in files:
+            start = time.perf_counter()
+            extract_text_from_file(uploaded_file)
+            latencies.append(time.perf_counter() - start)
+
+    _, elapsed, peak = measure(extract_each)
+    sequential = _stage_result("extract_file", len(files), elapsed, peak, latencies)
+    return [batch, sequential]
+
+
+def bench_analysis(cv_texts: List[str], workers: int) -> Dict[str, Any]:
+    """Analysis throughput; latency is the time from batch start until each CV's result."""
+    from services.analysis_pipeline import analyze_cvs
+
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+
+    def on_result(index: int, response: Dict[str, Any]):
+        nonlocal errors
+        latencies.append(time.perf_counter() - start)
+        errors += "error" in response
+
+    def run():
+        nonlocal start
+        start = time.perf_counter()
+        return analyze_cvs(cv_texts, max_workers=workers, on_result=on_result, use_cache=False)
+
+    responses, elapsed, peak = measure(run)
+    return _stage_result("analyze", len(cv_texts), elapsed, peak, latencies, errors), responses
+
+
+def bench_job(files: List, poll_interval: float = 0.01) -> Dict[str, Any]:
+    """End-to-end background job (extract, de-duplicate, analyze, store) from submit until it finishes.
+
+    Latency is the time from submission until each CV's result is checkpointed,
+    as observed by polling the job status.
+    """
+    from services.job_queue import ACTIVE_JOB_STATES, JOB_COMPLETED, JobQueue
+    from services.text_extraction import clear_extraction_cache
+
+    clear_extraction_cache()
+    queue = JobQueue(max_workers=1)
+    latencies = []
+
+    def run():
+        start = time.perf_counter()
+        job_id = queue.submit(files)
+        done = 0
+        while True:
+            job = queue.get_job(job_id)
+            finished = job["completed"] + job["failed"]
+            latencies.extend([time.perf_counter() - start] * (finished - done))
+            done = finished
+            if job["status"] not in ACTIVE_JOB_STATES:
+                return job
+            time.sleep(poll_interval)
+
+    try:
+        job, elapsed, peak = measure(run)
+    finally:
+        queue.shutdown()
+    errors = job["failed"] + (job["status"] != JOB_COMPLETED)
+    return _stage_result("job", len(files), elapsed, peak, latencies, errors)
+
+
+def bench_parse(responses: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List]:
+    """Time to parse the API responses into records."""
+    from services.analysis_model import parse_analysis
+
+    latencies = []
+
+    def parse_all():
+        records = []
+        for i, response in enumerate(responses):
+            if "error" in response:
+                continue
+            start = time.perf_counter()
+            records.append(parse_analysis(f"cv_{i+1}", response))
+            latencies.append(time.perf_counter() - start)
+        return records
+
+    records, elapsed, peak = measure(parse_all)
+    return _stage_result("parse", len(responses), elapsed, peak, latencies), records
+
+
+def bench_summary(records: List) -> Dict[str, Any]:
+    """Comparative summary time, starting from an empty digest cache."""
+    from services.openai_client import _get_digest_cache, summarize_cv_analyses
+
+    _get_digest_cache().clear()
+    summary, elapsed, peak = measure(lambda: summarize_cv_analyses(records))
+    errors = int(summary.startswith(("Error", "Failed")))
+    return _stage_result("summarize", len(records), elapsed, peak, [elapsed], errors)
+
+
+def print_table(results: List[Dict[str, Any]]):
+    columns = ["stage", "batch_size", "seconds", "throughput_per_s",
+               "p50_ms", "p95_ms", "peak_memory_mb", "errors"]
+    rows = [["-" if row[column] is None else str(row[column]) for column in columns]
+            for row in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows))
+              for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the CV analysis hot paths against a stub API.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100],
+                        help="Batch sizes to benchmark")
+    parser.add_argument("--workers", type=int,
+                        help="Analysis requests in flight (default: MAX_CONCURRENT_REQUESTS)")
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="Stub seconds per FastAgent request")
+    parser.add_argument("--completion-latency", type=float, default=0.5,
+                        help="Stub seconds per chat completion")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of stub requests answered with HTTP 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="Fraction of stub requests answered with HTTP 429")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-summary", action="store_true",
+                        help="Do not benchmark the comparative summary")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    server = StubServer(StubConfig(latency=args.latency, completion_latency=args.completion_latency,
+                                   error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                                   seed=args.seed)).start()
+    work_dir = tempfile.mkdtemp(prefix="cv_bench_")
+
+    # Point the app at the stub and at empty local caches before config is imported
+    os.environ.update(
+        API_BASE_URL=server.api_base_url,
+        AZURE_OPENAI_ENDPOINT=server.base_url,
+        AZURE_OPENAI_KEY="stub",
+        AZURE_BLOB_STORAGE_URL="",
+        LOCAL_DATA_DIR=os.path.join(work_dir, "data"),
+        ANALYSIS_CACHE_ENABLED="false"
+    )
+    # Don't let the client-side rate limiter cap the measured throughput unless asked to
+    os.environ.setdefault("API_RATE_LIMIT", "1000")
+    os.environ.setdefault("API_RATE_LIMIT_MAX", "1000")
+
+    from config import MAX_CONCURRENT_REQUESTS
+    from benchmarks.corpus import write_corpus
+    from services.text_extraction import LocalFile
+
+    workers = args.workers or MAX_CONCURRENT_REQUESTS
+    paths = write_corpus(max(args.sizes), os.path.join(work_dir, "corpus"))
+
+    results: List[Dict[str, Any]] = []
+    try:
+        for size in args.sizes:
+            files = [LocalFile(path) for path in paths[:size]]
+
+            results.extend(bench_extraction(files))
+
+            from services.text_extraction import extract_texts_from_files
+            analysis, responses = bench_analysis(
+                extract_texts_from_files(files), workers)
+            results.append(analysis)
+
+            results.append(bench_job(files))
+
+            parse, records = bench_parse(responses)
+            results.append(parse)
+
+            if not args.skip_summary and records:
+                results.append(bench_summary(records))
+    finally:
+        server.stop()
+
+    print_table(results)
+
+    if args.output:
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "settings": {"workers": workers, "latency": args.latency,
+                         "completion_latency": args.completion_latency,
+                         "error_rate": args.error_rate, "throttle_rate": args.throttle_rate,
+                         "seed": args.seed},
+            "results": results
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Local stub of the FastAgent and Azure OpenAI APIs for benchmarks.
+
+Serves POST /api/v1/chat, PUT /api/v1/messages/{id}/feedback and
+POST /openai/deployments/{name}/chat/completions (plain and streamed) with
+configurable latency, error and throttling rates.
+
+Usage:
+    python -m benchmarks.stub_server --port 8765 --latency 0.2 --error-rate 0.05
+"""
+
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+_FEEDBACK_PATH = re.compile(r"^/api/v1/messages/[^/]+/feedback$")
+_COMPLETIONS_PATH = re.compile(r"^/openai/deployments/[^/]+/chat/completions$")
+
+_SCORECARD = """### Scoring:
+
+| Criteria | Score (1-5) | Comment |
+|---------------------------|-------------|---------|
+| Technical Skills | {0} | Stub assessment. |
+| Experience | {1} | Stub assessment. |
+| Education | {2} | Stub assessment. |
+| Communication Skills | {3} | Stub assessment. |
+"""
+
+
+class StubConfig:
+    """Latency and failure behaviour of the stub server."""
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.05, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 1.0,
+                 completion_latency: float = 0.5, stream_chunks: int = 20, seed: Optional[int] = None):
+        # Seconds per FastAgent request, +/- jitter, and per chat completion
+        self.latency = latency
+        self.jitter = jitter
+        self.completion_latency = completion_latency
+        # Fractions of requests answered with 503 and with 429 + Retry-After
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.stream_chunks = stream_chunks
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def delay(self, base: float) -> float:
+        with self.lock:
+            return max(0.0, base + self.random.uniform(-self.jitter, self.jitter))
+
+    def failure(self) -> Optional[int]:
+        """Return the status code of an injected failure, or None."""
+        with self.lock:
+            roll = self.random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: StubConfig = StubConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        if self.headers.get("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        return json.loads(data or b"{}")
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _inject_failure(self) -> bool:
+        status = self.config.failure()
+        if status is None:
+            return False
+        headers = {"Retry-After": str(self.config.retry_after)} if status == 429 else None
+        self._send_json(status, {"error": "injected failure"}, headers)
+        return True
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        body = self._read_json()
+
+        if path == "/api/v1/chat":
+            time.sleep(self.config.delay(self.config.latency))
+            if not self._inject_failure():
+                self._send_json(200, self._chat_response(body))
+        elif _COMPLETIONS_PATH.match(path):
+            if self._inject_failure():
+                return
+            if body.get("stream"):
+                self._stream_completion()
+            else:
+                time.sleep(self.config.delay(self.config.completion_latency))
+                self._send_json(200, {"choices": [{"message": {"role": "assistant",
+                                                               "content": self._completion_text()}}]})
+        else:
+            self._send_json(404, {"error": f"Unknown path {path}"})
+
+    def do_PUT(self):
+        path = self.path.split("?")[0]
+        body = self._read_json()
+
+        if _FEEDBACK_PATH.match(path):
+            time.sleep(self.config.delay(self.config.latency / 4))
+            if not self._inject_failure():
+                self._send_json(200, {"message_id": body.get("message_id"), "status": "ok"})
+        else:
+            self._send_json(404, {"error": f"Unknown path {path}"})
+
+    def _chat_response(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        user_prompt = json.loads(body.get("user_prompt", "{}"))
+        cv_text = "\n\n".join(value for key, value in sorted(user_prompt.items())
+                                if key.startswith("Page_"))
+
+        # Deterministic scores per CV so repeated runs produce the same records
+        rng = random.Random(cv_text)
+        summary = (f"### Overall Summary:\nStub evaluation of {user_prompt.get('identifier', 'cv')} "
+                   f"({len(cv_text)} characters).\n\n"
+                   + _SCORECARD.format(*(rng.randint(1, 5) for _ in range(4))))
+        agent_response = [
+            {"__dict__": {"chat_name": name, "chat_response": {"chat_message": {"__dict__": {"content": content}}}}}
+            for name, content in (("summary", summary),
+                                  ("applicant_lookup_agent", "No public profile found."))
+        ]
+        return {
+            "agent_response": json.dumps(agent_response),
+            "thread_id": body.get("thread_id", str(uuid.uuid4())),
+            "message_id": str(uuid.uuid4())
+        }
+
+    def _completion_text(self) -> str:
+        return "## Candidate Comparison\n\nStub comparison of the submitted candidates."
+
+    def _stream_completion(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        text = self._completion_text()
+        chunks = max(1, min(self.config.stream_chunks, len(text)))
+        pause = self.config.delay(self.config.completion_latency) / chunks
+        try:
+            for i in range(chunks):
+                piece = text[i * len(text) // chunks:(i + 1) * len(text) // chunks]
+                event = {"choices": [{"delta": {"content": piece}}]}
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                time.sleep(pause)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client may hang up as soon as it has read [DONE]
+            pass
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubServer:
+    """Stub API server running on a background thread.
+
+        with StubServer(StubConfig(latency=0.1)) as server:
+            os.environ["API_BASE_URL"] = server.api_base_url
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        handler = type("ConfiguredStubHandler", (StubHandler,),
+                       {"config": config or StubConfig()})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base_url(self) -> str:
+        """Value for API_BASE_URL."""
+        return f"{self.base_url}/api/v1"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the stub FastAgent/Azure OpenAI server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="Seconds per FastAgent request")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--completion-latency", type=float, default=0.5,
+                        help="Seconds per chat completion")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = StubConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        throttle_rate=args.throttle_rate, completion_latency=args.completion_latency,
+                        seed=args.seed)
+    server = StubServer(config, host=args.host, port=args.port)
+    print(f"Stub API listening on {server.base_url}")
+    print(f"  API_BASE_URL={server.api_base_url}")
+    print(f"  AZURE_OPENAI_ENDPOINT={server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+CV Analysis Tool - Headless Batch Entry Point
+
+Runs text extraction, CV analysis and the comparative summary over a directory
+of CV files without a browser session, writing the results to JSONL and CSV.
+
+Usage:
+    python cli.py resumes/pdf_resumes --output results.jsonl --csv results.csv
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from config import (
+    MAX_CONCURRENT_REQUESTS,
+    ANALYSIS_CACHE_ENABLED,
+    DEDUP_ENABLED,
+    PRESCREEN_ENABLED,
+    PRESCREEN_MIN_SCORE
+)
+from services.analysis_model import CandidateAnalysis, parse_analysis
+from services.analysis_pipeline import analyze_cvs
+from services.dedup import DuplicateIndex
+from services.prescreen import prescreen
+from services.text_extraction import LocalFile, extract_texts_from_files, is_extraction_failure
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".md")
+
+CSV_FIELDS = ["Source File", "CV Name", "Overall Score", "Analysis",
+              "Thread ID", "Message ID", "Cached", "Source Files", "Duplicate Of", "Error"]
+
+logger = logging.getLogger("cv_analysis")
+
+
+def find_cv_files(input_dir: str, recursive: bool = False) -> List[str]:
+    """Return the supported CV files in a directory, sorted by path."""
+    paths = []
+    for root, _, files in os.walk(input_dir):
+        for file_name in files:
+            if os.path.splitext(file_name)[1].lower() in SUPPORTED_EXTENSIONS:
+                paths.append(os.path.join(root, file_name))
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+def read_chunk(paths: List[str], start: int = 0,
+               duplicates: Optional[DuplicateIndex] = None) -> List[Dict[str, Any]]:
+    """Extract the text of one chunk of files, returning one outcome per file in order.
+
+    Outcomes of files to analyze carry their ``"text"``; failed extractions get
+    ``"error"``. With a ``duplicates`` index shared across chunks, files duplicating
+    one read before, in this chunk or an earlier one, get ``"duplicate_of"``.
+    ``start`` is the position of the chunk in the whole input.
+    """
+    files = [LocalFile(path) for path in paths]
+    cv_texts = extract_texts_from_files(files)
+
+    outcomes = []
+    for i, (path, file, cv_text) in enumerate(zip(paths, files, cv_texts)):
+        outcome = {"path": path, "index": start + i, "text": None, "source_files": [file.name],
+                   "record": None, "error": None, "skipped": False, "duplicate_of": None}
+        outcomes.append(outcome)
+
+        # Only send files whose text could be extracted, and one copy of each duplicate
+        if is_extraction_failure(cv_text):
+            outcome["error"] = cv_text
+            logger.warning("Skipping %s: %s", path, cv_text)
+            continue
+        if duplicates is not None:
+            outcome["duplicate_of"] = duplicates.add(path, cv_text)
+            if outcome["duplicate_of"] is not None:
+                logger.info("Skipping %s: duplicate of %s", path, outcome["duplicate_of"])
+                continue
+        outcome["text"] = cv_text
+
+    return outcomes
+
+
+def screen_outcomes(outcomes: List[Dict[str, Any]], criteria_text: str,
+                    min_score: float = PRESCREEN_MIN_SCORE) -> List[Dict[str, Any]]:
+    """Rank the outcomes to analyze against the criteria, best match first, over the whole input.
+
+    Outcomes scoring below ``min_score`` are marked ``"skipped"`` and left out.
+    """
+    queued, skipped = prescreen(
+        [outcome["text"] for outcome in outcomes], criteria_text, min_score)
+    for j, score in skipped:
+        outcome = outcomes[j]
+        outcome["text"] = None
+        outcome["skipped"] = True
+        outcome["error"] = f"Pre-screen score {score:.2f} below {min_score:.2f}"
+        logger.info("Skipping %s: %s", outcome["path"], outcome["error"])
+    return [outcomes[j] for j in queued]
+
+
+def analyze_chunk(outcomes: List[Dict[str, Any]], workers: int, criteria_version: str,
+                  use_cache: bool):
+    """Analyze one chunk of extracted files, filling in each outcome's record or error."""
+    def on_result(index: int, response: Dict[str, Any]):
+        path = outcomes[index]["path"]
+        if "error" in response:
+            logger.error("Error analyzing %s: %s", path, response["error"])
+        else:
+            logger.info("Analyzed %s%s", path,
+                        " (cached)" if response.get("cached") else "")
+
+    responses = analyze_cvs(
+        [outcome["text"] for outcome in outcomes],
+        identifiers=[f"cv_{outcome['index']+1}" for outcome in outcomes],
+        max_workers=workers,
+        on_result=on_result,
+        criteria_version=criteria_version,
+        use_cache=use_cache,
+        cv_names=[outcome["source_files"][0] for outcome in outcomes]
+    )
+
+    for outcome, response in zip(outcomes, responses):
+        # The text is no longer needed once the file is analyzed
+        outcome["text"] = None
+        if "error" in response:
+            outcome["error"] = response["error"]
+        else:
+            outcome["record"] = parse_analysis(
+                outcome["source_files"][0], response, outcome["source_files"])
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Analyze a directory of CVs without the Streamlit UI.")
+    parser.add_argument("input_dir", help="Directory containing CV files")
+    parser.add_argument("--output", default="cv_analysis_results.jsonl",
+                        help="JSONL file to write one analysis per line to")
+    parser.add_argument("--csv", dest="csv_path",
+                        help="Optional CSV file to write the export rows to")
+    parser.add_argument("--summary",
+                        help="Optional Markdown file to write the comparative summary to")
+    parser.add_argument("--workers", type=int, default=MAX_CONCURRENT_REQUESTS,
+                        help="Maximum number of analysis requests in flight")
+    parser.add_argument("--chunk-size", type=int, default=100,
+                        help="Number of files read into memory, and analyzed, at a time")
+    parser.add_argument("--recursive", action="store_true",
+                        help="Include files in subdirectories")
+    parser.add_argument("--criteria-version",
+                        help="Job criteria version used for cache keys (default: blob ETag)")
+    parser.add_argument("--criteria-file",
+                        help="Job criteria document to pre-screen CVs against (default: the criteria in blob storage)")
+    parser.add_argument("--min-score", type=float, default=PRESCREEN_MIN_SCORE,
+                        help="Skip CVs whose pre-screen score (0-1) is below this")
+    parser.add_argument("--no-prescreen", action="store_true",
+                        help="Analyze CVs in directory order without pre-screening")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Analyze duplicate CV files separately")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always call the API instead of using the analysis cache")
+    parser.add_argument("--upload-prefix",
+                        help="Archive the CV files and output files to blob storage under this prefix")
+    parser.add_argument("--metrics-file",
+                        help="Write per-stage timing metrics in Prometheus text format to this file")
+    parser.add_argument("--trace-file",
+                        help="Write a JSON trace of every timed stage to this file")
+    parser.add_argument("--log-level", default="INFO",
+                        help="Logging level (DEBUG, INFO, WARNING, ERROR)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a batch analysis and return the process exit code."""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+    paths = find_cv_files(args.input_dir, recursive=args.recursive)
+    if not paths:
+        logger.error("No supported CV files found in %s", args.input_dir)
+        return 1
+    logger.info("Found %d CV files in %s", len(paths), args.input_dir)
+
+    criteria_version = args.criteria_version
+    if criteria_version is None:
+        from services.job_criteria import get_job_criteria_version
+        criteria_version = get_job_criteria_version()
+
+    criteria_text = ""
+    if PRESCREEN_ENABLED and not args.no_prescreen:
+        criteria_text = load_criteria_text(args.criteria_file)
+
+    use_cache = ANALYSIS_CACHE_ENABLED and not args.no_cache
+    # Shared by every chunk so duplicates are found across the whole input
+    duplicate_index = DuplicateIndex() if DEDUP_ENABLED and not args.no_dedup else None
+    records: List[CandidateAnalysis] = []
+    failures = 0
+    skipped = 0
+    duplicates = 0
+    start_time = time.time()
+
+    csv_file = None
+    csv_writer = None
+    if args.csv_path:
+        csv_file = open(args.csv_path, "w", newline="", encoding="utf-8")
+        csv_writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDS)
+        csv_writer.writeheader()
+
+    def write_outcome(outcome: Dict[str, Any]):
+        nonlocal failures, skipped, duplicates
+        record = outcome["record"]
+        line = {"source_file": outcome["path"],
+                "error": outcome["error"]}
+        if record is not None:
+            line.update(record.to_dict())
+            records.append(record)
+        elif outcome["skipped"]:
+            line["skipped"] = True
+            skipped += 1
+        elif outcome["duplicate_of"]:
+            line["duplicate_of"] = outcome["duplicate_of"]
+            duplicates += 1
+        else:
+            failures += 1
+        jsonl_file.write(json.dumps(line) + "\n")
+
+        if csv_writer is not None:
+            row = {"Source File": outcome["path"]}
+            if record is not None:
+                row.update(record.to_export_row())
+            row["Duplicate Of"] = outcome["duplicate_of"] or ""
+            row["Error"] = outcome["error"] or ""
+            csv_writer.writerow(row)
+
+    chunk_size = max(1, args.chunk_size)
+    try:
+        with open(args.output, "w", encoding="utf-8") as jsonl_file:
+            # Read the files a chunk at a time, keeping only their extracted text, so
+            # duplicates and pre-screen ranking are computed over the whole input
+            outcomes: List[Dict[str, Any]] = []
+            for start in range(0, len(paths), chunk_size):
+                outcomes.extend(read_chunk(paths[start:start + chunk_size], start, duplicate_index))
+                logger.info("Read %d/%d files", min(start + chunk_size, len(paths)), len(paths))
+
+            # Each analysis covers every copy of its file
+            by_path = {outcome["path"]: outcome for outcome in outcomes}
+            for outcome in outcomes:
+                if outcome["duplicate_of"]:
+                    by_path[outcome["duplicate_of"]]["source_files"].extend(outcome["source_files"])
+
+            to_analyze = [outcome for outcome in outcomes if outcome["text"] is not None]
+            if criteria_text and to_analyze:
+                to_analyze = screen_outcomes(to_analyze, criteria_text, args.min_score)
+
+            # Files that will not be analyzed are written straight away
+            for outcome in outcomes:
+                if outcome["text"] is None:
+                    write_outcome(outcome)
+            jsonl_file.flush()
+
+            for start in range(0, len(to_analyze), chunk_size):
+                chunk = to_analyze[start:start + chunk_size]
+                analyze_chunk(chunk, args.workers, criteria_version, use_cache)
+                for outcome in chunk:
+                    write_outcome(outcome)
+                jsonl_file.flush()
+                logger.info("Analyzed %d/%d files",
+                            min(start + chunk_size, len(to_analyze)), len(to_analyze))
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+
+    logger.info("Analyzed %d files (%d failed, %d skipped by pre-screening, %d duplicates) in %.1fs",
+                len(records), failures, skipped, duplicates, time.time() - start_time)
+
+    if args.summary and records:
+        from services.openai_client import summarize_cv_analyses
+
+        logger.info("Generating comparative summary of %d CVs", len(records))
+        with open(args.summary, "w", encoding="utf-8") as summary_file:
+            summary_file.write(summarize_cv_analyses(records))
+
+    if args.upload_prefix is not None:
+        archive_to_blob_storage(
+            paths + [path for path in (args.output, args.csv_path, args.summary) if path],
+            args.upload_prefix, args.input_dir)
+
+    write_metrics(args.metrics_file, args.trace_file)
+
+    return 1 if failures else 0
+
+
+def write_metrics(metrics_path: Optional[str], trace_path: Optional[str]):
+    """Write the stage timings recorded during this run, if asked for."""
+    from services.metrics import metrics
+
+    for row in metrics.stage_breakdown():
+        logger.debug("Stage %(stage)s: %(count)d runs, %(total_s).3fs total, "
+                     "p95 %(p95_ms).1fms, %(errors)d errors", row)
+
+    if metrics_path:
+        with open(metrics_path, "w", encoding="utf-8") as f:
+            f.write(metrics.prometheus_text())
+    if trace_path:
+        with open(trace_path, "w", encoding="utf-8") as f:
+            f.write(metrics.trace_json())
+
+
+def load_criteria_text(criteria_file: Optional[str]) -> str:
+    """Return the job criteria text from a document, or from blob storage if no file is given."""
+    if criteria_file is None:
+        from services.job_criteria import get_job_criteria_text
+        return get_job_criteria_text()
+
+    text = extract_texts_from_files([LocalFile(criteria_file)])[0]
+    if is_extraction_failure(text):
+        logger.warning("Not pre-screening; could not read %s: %s", criteria_file, text)
+        return ""
+    return text
+
+
+def archive_to_blob_storage(paths: List[str], prefix: str, input_dir: str):
+    """Upload files to blob storage in parallel under a name prefix, keeping paths relative to the input directory."""
+    from services.blob_storage import get_azure_blob_client
+
+    client = get_azure_blob_client()
+    client.ensure_container()
+
+    start_time = time.time()
+    outcomes = client.upload_files(paths, prefix=prefix, base_dir=input_dir)
+    failed = [path for path, ok in outcomes.items() if not ok]
+    logger.info("Uploaded %d files to %s/%s in %.1fs (%d failed)",
+                len(paths) - len(failed), client.container_name, prefix,
+                time.time() - start_time, len(failed))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,6 @@ Loads environment variables and provides application configuration.
 """
 
 import os
-import streamlit as st
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -20,18 +19,158 @@ DEFAULT_REVISION_ID = os.getenv(
 
 # Azure Blob Storage Configuration
 AZURE_BLOB_STORAGE_URL = os.getenv("AZURE_BLOB_STORAGE_URL", "")
+# Alternative to the SAS URL, e.g. "UseDevelopmentStorage=true" for a local Azurite emulator
+AZURE_STORAGE_CONNECTION_STRING = os.getenv(
+    "AZURE_STORAGE_CONNECTION_STRING", "")
+# Container and job criteria blob used with a connection string
+AZURE_BLOB_CONTAINER = os.getenv("AZURE_BLOB_CONTAINER", "cv-analysis")
+AZURE_JOB_CRITERIA_BLOB = os.getenv(
+    "AZURE_JOB_CRITERIA_BLOB", "job_criteria.json")
+# Block size for chunked transfers, parallel blocks per blob, and blobs transferred at once in bulk operations
+BLOB_CHUNK_SIZE_BYTES = int(os.getenv(
+    "BLOB_CHUNK_SIZE_BYTES", str(4 * 1024 * 1024)))
+BLOB_MAX_CONCURRENCY = int(os.getenv("BLOB_MAX_CONCURRENCY", "4"))
+BLOB_TRANSFER_WORKERS = int(os.getenv("BLOB_TRANSFER_WORKERS", "8"))
 
 # Azure OpenAI API Configuration
 AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT", "")
 AZURE_OPENAI_KEY = os.getenv("AZURE_OPENAI_KEY", "")
 AZURE_OPENAI_DEPLOYMENT_NAME = os.getenv(
     "AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o-mini")
+# Prompts estimated above this many tokens are summarized in map-reduce batches
+SUMMARY_PROMPT_TOKEN_BUDGET = int(
+    os.getenv("SUMMARY_PROMPT_TOKEN_BUDGET", "12000"))
+# Completion token limits for the final comparison and for each batch summary
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "2000"))
+SUMMARY_BATCH_MAX_TOKENS = int(os.getenv("SUMMARY_BATCH_MAX_TOKENS", "800"))
+# Batch summaries requested from Azure OpenAI in parallel
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "4"))
+# Build the comparison from cached per-candidate digests instead of full analyses
+SUMMARY_INCREMENTAL = os.getenv(
+    "SUMMARY_INCREMENTAL", "true").lower() in ("1", "true", "yes")
+SUMMARY_DIGEST_MAX_TOKENS = int(os.getenv("SUMMARY_DIGEST_MAX_TOKENS", "300"))
+
+# Analysis Pipeline Configuration
+# Maximum number of CV analysis requests in flight against the FastAgent API
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "4"))
+
+# API Resilience Configuration
+# Initial, minimum and maximum request rate (requests/second) for the adaptive rate limiter
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "10"))
+API_RATE_LIMIT_MIN = float(os.getenv("API_RATE_LIMIT_MIN", "0.5"))
+API_RATE_LIMIT_MAX = float(os.getenv("API_RATE_LIMIT_MAX", "50"))
+# Retries for 429/5xx/connection errors, with jittered exponential backoff capped at API_RETRY_MAX_WAIT seconds
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "4"))
+API_RETRY_MAX_WAIT = float(os.getenv("API_RETRY_MAX_WAIT", "30"))
+# Consecutive failures before calls fail fast, and seconds before a trial call is allowed
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(
+    os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+CIRCUIT_BREAKER_RESET_SECONDS = float(
+    os.getenv("CIRCUIT_BREAKER_RESET_SECONDS", "30"))
+
+# HTTP Transport Configuration
+# Connections kept open per host; should be at least MAX_CONCURRENT_REQUESTS
+HTTP_POOL_SIZE = int(os.getenv(
+    "HTTP_POOL_SIZE", str(max(10, MAX_CONCURRENT_REQUESTS))))
+# Default timeout in seconds for API calls (CV analysis can take a while)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "120"))
+
+# Chat Payload Configuration
+# Collapse whitespace, rejoin hyphenated words and drop repeated page headers/footers before sending a CV
+CHAT_NORMALIZE_TEXT = os.getenv(
+    "CHAT_NORMALIZE_TEXT", "true").lower() in ("1", "true", "yes")
+# Characters of normalized CV text sent per request; 0 disables the cap
+CHAT_MAX_CHARS = int(os.getenv("CHAT_MAX_CHARS", "0"))
+# Send each PDF page as its own Page_N field instead of everything in Page_1
+CHAT_SPLIT_PAGES = os.getenv(
+    "CHAT_SPLIT_PAGES", "false").lower() in ("1", "true", "yes")
+# Gzip request bodies of at least API_GZIP_MIN_BYTES; turned off for the process if the server answers 415
+API_GZIP_REQUESTS = os.getenv(
+    "API_GZIP_REQUESTS", "false").lower() in ("1", "true", "yes")
+API_GZIP_MIN_BYTES = int(os.getenv("API_GZIP_MIN_BYTES", "1024"))
+
+# Text Extraction Configuration
+# Worker processes used to parse documents in parallel; 1 disables the process pool
+EXTRACTION_WORKERS = int(os.getenv(
+    "EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Number of extracted documents kept in memory, keyed by file content hash
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "256"))
+# PDFs with at least this many pages are split across the process pool
+PDF_PARALLEL_PAGE_THRESHOLD = int(
+    os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "16"))
+# Uploads larger than this are read in place, page by page, instead of being copied
+STREAMING_EXTRACTION_THRESHOLD_BYTES = int(os.getenv(
+    "STREAMING_EXTRACTION_THRESHOLD_BYTES", str(10 * 1024 * 1024)))
+# Caps on the pages and characters extracted per document; 0 disables a cap
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "200"))
+EXTRACTION_MAX_CHARS = int(os.getenv("EXTRACTION_MAX_CHARS", "500000"))
+# Non-seekable uploads are spooled to disk once they exceed this size
+EXTRACTION_SPOOL_MAX_MEMORY_BYTES = int(os.getenv(
+    "EXTRACTION_SPOOL_MAX_MEMORY_BYTES", str(4 * 1024 * 1024)))
+
+# Analysis Cache Configuration
+# Local directory for on-disk caches and stores
+LOCAL_DATA_DIR = os.getenv(
+    "LOCAL_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+ANALYSIS_CACHE_ENABLED = os.getenv(
+    "ANALYSIS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANALYSIS_CACHE_PATH = os.getenv(
+    "ANALYSIS_CACHE_PATH", os.path.join(LOCAL_DATA_DIR, "analysis_cache.db"))
+# Entries older than this are discarded (default: 7 days); 0 disables expiry
+ANALYSIS_CACHE_TTL_SECONDS = float(
+    os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Least recently used entries are evicted beyond this count; 0 disables the limit
+ANALYSIS_CACHE_MAX_ENTRIES = int(
+    os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "5000"))
+
+# Results Store Configuration
+RESULTS_DB_PATH = os.getenv(
+    "RESULTS_DB_PATH", os.path.join(LOCAL_DATA_DIR, "results.db"))
+# Candidates listed per page of the results index, and past runs offered for reloading
+RESULTS_PAGE_SIZE = int(os.getenv("RESULTS_PAGE_SIZE", "25"))
+RESULTS_RECENT_RUNS = int(os.getenv("RESULTS_RECENT_RUNS", "20"))
+# Loaded candidate analyses kept in memory for redisplay without reading the store
+RESULTS_RENDER_CACHE_SIZE = int(os.getenv("RESULTS_RENDER_CACHE_SIZE", "256"))
+
+# Background Job Configuration
+# Analysis jobs run at once across all sessions; each job uses up to MAX_CONCURRENT_REQUESTS requests
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Seconds between progress refreshes while a job is running
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+
+# Pre-screening Configuration
+# Rank CVs against the job criteria text locally before analysis, best match first
+PRESCREEN_ENABLED = os.getenv(
+    "PRESCREEN_ENABLED", "true").lower() in ("1", "true", "yes")
+# CVs covering less than this weighted share (0-1) of the criteria terms are not analyzed; 0 analyzes every CV
+PRESCREEN_MIN_SCORE = float(os.getenv("PRESCREEN_MIN_SCORE", "0"))
+# BM25 term frequency saturation and length normalization
+PRESCREEN_K1 = float(os.getenv("PRESCREEN_K1", "1.5"))
+PRESCREEN_B = float(os.getenv("PRESCREEN_B", "0.75"))
+
+# Duplicate Detection Configuration
+# Collapse exact and near-duplicate CVs (e.g. the same resume as PDF and DOCX) into one analysis
+DEDUP_ENABLED = os.getenv(
+    "DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+# Estimated Jaccard similarity of word shingles above which two CVs count as duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "5"))
+
+# Instrumentation Configuration
+# Record per-stage timings and sizes, keeping at most METRICS_MAX_SPANS recent spans in memory
+METRICS_ENABLED = os.getenv(
+    "METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_MAX_SPANS = int(os.getenv("METRICS_MAX_SPANS", "50000"))
 
 # Streamlit page configuration
 
 
 def configure_page():
     """Configure the Streamlit page settings."""
+    # Imported here so the services can be used without Streamlit
+    import streamlit as st
+
     st.set_page_config(
         page_title="CV Analysis Tool",
         page_icon="📄",
@@ -1,22 +1,64 @@
 """
 Services package for the CV Analysis Tool.
 Contains modules for API communication, blob storage, and text extraction.
+
+Exports are resolved on first access, so importing the package does not load
+pypdf, docx2txt, requests or the Azure SDK until a service that needs them is used.
 """
 
-from services.api_client import APIClient
-from services.blob_storage import AzureBlobClient
-from services.text_extraction import (
-    extract_text_from_file,
-    extract_text_from_pdf,
-    extract_text_from_docx
-)
-from services.openai_client import summarize_cv_analyses
-
-__all__ = [
-    'APIClient',
-    'AzureBlobClient',
-    'extract_text_from_file',
-    'extract_text_from_pdf',
-    'extract_text_from_docx',
-    'summarize_cv_analyses'
-]
+import importlib
+
+# Exported name -> module that defines it
+_EXPORTS = {
+    'APIClient': 'services.api_client',
+    'AzureBlobClient': 'services.blob_storage',
+    'get_azure_blob_client': 'services.blob_storage',
+    'is_blob_storage_configured': 'services.blob_storage',
+    'extract_text_from_file': 'services.text_extraction',
+    'extract_texts_from_files': 'services.text_extraction',
+    'iter_text_pages': 'services.text_extraction',
+    'LocalFile': 'services.text_extraction',
+    'extract_text_from_pdf': 'services.text_extraction',
+    'extract_text_from_docx': 'services.text_extraction',
+    'summarize_cv_analyses': 'services.openai_client',
+    'stream_cv_summary': 'services.openai_client',
+    'analyze_cvs': 'services.analysis_pipeline',
+    'normalize_cv_text': 'services.text_normalization',
+    'normalize_pages': 'services.text_normalization',
+    'get_session': 'services.http_session',
+    'close_sessions': 'services.http_session',
+    'AnalysisCache': 'services.analysis_cache',
+    'get_analysis_cache': 'services.analysis_cache',
+    'CandidateAnalysis': 'services.analysis_model',
+    'AgentSection': 'services.analysis_model',
+    'parse_analysis': 'services.analysis_model',
+    'AsyncAPIClient': 'services.async_client',
+    'ResultsStore': 'services.results_store',
+    'get_results_store': 'services.results_store',
+    'JobQueue': 'services.job_queue',
+    'get_job_queue': 'services.job_queue',
+    'JobCriteriaCache': 'services.job_criteria',
+    'get_job_criteria_cache': 'services.job_criteria',
+    'get_job_criteria_version': 'services.job_criteria',
+    'DuplicateIndex': 'services.dedup',
+    'group_duplicates': 'services.dedup',
+    'rank_cvs': 'services.prescreen',
+    'score_cvs': 'services.prescreen',
+    'MetricsRecorder': 'services.metrics',
+    'run_context': 'services.metrics'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    # Cache on the package so later lookups skip this hook
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,137 @@
+"""
+Persistent on-disk cache for CV analysis responses.
+Entries are content-addressed and evicted by age (TTL) and entry count (LRU).
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from config import ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_TTL_SECONDS, ANALYSIS_CACHE_MAX_ENTRIES
+
+
+def make_cache_key(*parts: str) -> str:
+    """Build a content-addressed cache key from the given parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        # Separator so ("ab", "c") and ("a", "bc") hash differently
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def cv_text_hash(cv_text: str) -> str:
+    """SHA-256 of the extracted CV text."""
+    return hashlib.sha256(cv_text.encode("utf-8")).hexdigest()
+
+
+def analysis_cache_key(cv_text: str, revision_id: str, criteria_version: str,
+                       payload_options: str = "") -> str:
+    """Cache key for a CV analysis: CV text hash, revision ID, job criteria version and payload settings."""
+    return make_cache_key("analysis", cv_text_hash(cv_text), revision_id, criteria_version,
+                          payload_options)
+
+
+class AnalysisCache:
+    """SQLite-backed key/value cache with TTL and least-recently-used eviction."""
+
+    def __init__(self, path: str = ANALYSIS_CACHE_PATH, namespace: str = "analysis",
+                 ttl_seconds: float = ANALYSIS_CACHE_TTL_SECONDS,
+                 max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.table = f"cache_{namespace}"
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_access "
+                f"ON {self.table} (last_access)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation keeps the cache safe to use from worker threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                conn.execute(
+                    f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+
+            conn.execute(
+                f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: str):
+        """Store a value and evict expired or least recently used entries."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Remove expired entries, then trim to the maximum entry count."""
+        if self.ttl_seconds > 0:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        if self.max_entries > 0:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock, self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+_analysis_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Return the process-wide analysis cache, creating it on first use."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        with _analysis_cache_lock:
+            if _analysis_cache is None:
+                _analysis_cache = AnalysisCache()
+    return _analysis_cache
@@ -0,0 +1,194 @@
+"""
+Structured model for FastAgent analysis responses.
+Responses are parsed once at ingest into compact records that are shared by
+rendering, summarization and export, instead of re-decoding the raw JSON.
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from services.metrics import metrics
+
+# Agent sections shown in the results tabs and used for the comparative summary
+DISPLAY_SECTIONS = ("summary",)
+COMPARISON_SECTIONS = ("summary", "applicant_lookup_agent")
+
+# A markdown table cell holding a score such as "4", "8.5" or "7/10"
+_SCORE_CELL = re.compile(r"^\s*\**(\d+(?:\.\d+)?)\**\s*(?:/\s*\d+)?\s*$")
+
+
+@dataclass(frozen=True)
+class AgentSection:
+    """Content produced by one agent in the FastAgent conversation flow."""
+    __slots__ = ("chat_name", "content")
+
+    chat_name: str
+    content: str
+
+
+@dataclass
+class CandidateAnalysis:
+    """Parsed analysis of a single CV."""
+    __slots__ = ("cv_name", "thread_id", "message_id", "sections",
+                 "scores", "analysis_hash", "cached", "raw_fallback", "source_files")
+
+    cv_name: str
+    thread_id: str
+    message_id: str
+    sections: Tuple[AgentSection, ...]
+    # Criterion -> score as reported in the summary scorecard
+    scores: Dict[str, float]
+    # SHA-256 of the raw agent response, used as a stable cache key
+    analysis_hash: str
+    cached: bool
+    # Raw response text, kept only when it could not be parsed into sections
+    raw_fallback: str
+    # Every uploaded file this analysis covers: cv_name plus any duplicates collapsed into it
+    source_files: Tuple[str, ...]
+
+    def section_text(self, chat_names: Sequence[str]) -> str:
+        """Join the content of the sections produced by the given agents."""
+        return "".join(section.content + "\n" for section in self.sections
+                       if section.chat_name in chat_names)
+
+    @property
+    def summary_content(self) -> str:
+        """Markdown shown in the results tab for this CV."""
+        return self.section_text(DISPLAY_SECTIONS) or self.raw_fallback
+
+    @property
+    def comparison_text(self) -> str:
+        """Text used to compare this candidate in the comparative summary."""
+        return self.section_text(COMPARISON_SECTIONS) or self.raw_fallback or "No analysis available"
+
+    @property
+    def overall_score(self) -> Optional[float]:
+        """Mean of the scorecard scores, or None if no scores were found."""
+        if not self.scores:
+            return None
+        return round(sum(self.scores.values()) / len(self.scores), 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the record to plain JSON-compatible types."""
+        return {
+            "cv_name": self.cv_name,
+            "thread_id": self.thread_id,
+            "message_id": self.message_id,
+            "sections": [[section.chat_name, section.content] for section in self.sections],
+            "scores": self.scores,
+            "analysis_hash": self.analysis_hash,
+            "cached": self.cached,
+            "raw_fallback": self.raw_fallback,
+            "source_files": list(self.source_files)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CandidateAnalysis":
+        """Rebuild a record serialized with to_dict."""
+        return cls(
+            cv_name=data.get("cv_name", ""),
+            thread_id=data.get("thread_id", ""),
+            message_id=data.get("message_id", ""),
+            sections=tuple(AgentSection(chat_name, content)
+                           for chat_name, content in data.get("sections", [])),
+            scores=dict(data.get("scores", {})),
+            analysis_hash=data.get("analysis_hash", ""),
+            cached=data.get("cached", False),
+            raw_fallback=data.get("raw_fallback", ""),
+            source_files=tuple(data.get("source_files") or [data.get("cv_name", "")])
+        )
+
+    def to_export_row(self) -> Dict[str, Any]:
+        """Flatten the record into a row for CSV export."""
+        return {
+            "CV Name": self.cv_name,
+            "Overall Score": self.overall_score,
+            "Analysis": self.comparison_text,
+            "Thread ID": self.thread_id,
+            "Message ID": self.message_id,
+            "Cached": self.cached,
+            "Source Files": "; ".join(self.source_files)
+        }
+
+
+def _parse_sections(agent_response: str) -> Tuple[AgentSection, ...]:
+    """Parse the agent response JSON into its non-empty sections."""
+    analysis_data = json.loads(agent_response)
+
+    sections = []
+    for header in analysis_data:
+        chat_dict = header.get('__dict__', {})
+        chat_name = chat_dict.get('chat_name', '')
+        chat_response = chat_dict.get('chat_response', {})
+        chat_message = chat_response.get('chat_message', {})
+        content = chat_message.get('__dict__', {}).get('content', '')
+
+        if content:
+            sections.append(AgentSection(chat_name, content))
+    return tuple(sections)
+
+
+def parse_scores(markdown: str) -> Dict[str, float]:
+    """Extract criterion scores from markdown table rows such as "| Experience | 5 | ... |"."""
+    scores: Dict[str, float] = {}
+    for line in markdown.splitlines():
+        line = line.strip()
+        if not line.startswith("|"):
+            continue
+
+        cells = [cell.strip() for cell in line.strip("|").split("|")]
+        if len(cells) < 2 or not cells[0]:
+            continue
+
+        # Use the first numeric cell after the criterion name
+        for cell in cells[1:]:
+            match = _SCORE_CELL.match(cell)
+            if match:
+                scores[cells[0].strip("* ")] = float(match.group(1))
+                break
+    return scores
+
+
+def parse_analysis(cv_name: str, response: Dict[str, Any],
+                   source_files: Sequence[str] = ()) -> CandidateAnalysis:
+    """Parse a FastAgent /chat response into a CandidateAnalysis record.
+
+    ``source_files`` lists every file the analysis covers, defaulting to ``cv_name`` alone.
+    """
+    agent_response = response.get("agent_response", "Analysis failed")
+    if not isinstance(agent_response, str):
+        agent_response = json.dumps(agent_response)
+
+    with metrics.span("parse", size=len(agent_response), cv=cv_name) as span:
+        try:
+            sections = _parse_sections(agent_response)
+            raw_fallback = "" if sections else agent_response
+        except Exception:
+            # Keep the raw text so the analysis can still be shown
+            sections = ()
+            raw_fallback = agent_response
+            span.error = True
+
+    summary_markdown = "".join(section.content for section in sections
+                               if section.chat_name in DISPLAY_SECTIONS)
+
+    return CandidateAnalysis(
+        cv_name=cv_name,
+        thread_id=response.get("thread_id", ""),
+        message_id=response.get("message_id", ""),
+        sections=sections,
+        scores=parse_scores(summary_markdown),
+        analysis_hash=hashlib.sha256(
+            agent_response.encode("utf-8")).hexdigest(),
+        cached=response.get("cached", False),
+        raw_fallback=raw_fallback,
+        source_files=tuple(source_files) or (cv_name,)
+    )
+
+
+def export_rows(records: List[CandidateAnalysis]) -> List[Dict[str, Any]]:
+    """Flatten records into rows for CSV export."""
+    return [record.to_export_row() for record in records]
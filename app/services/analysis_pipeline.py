@@ -0,0 +1,103 @@
+"""
+Concurrent analysis pipeline for sending CVs to the FastAgent API.
+Runs a bounded number of requests in parallel and returns results in input order.
+"""
+
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from config import MAX_CONCURRENT_REQUESTS, DEFAULT_REVISION_ID, ANALYSIS_CACHE_ENABLED
+from services.api_client import APIClient, CHAT_PAYLOAD_OPTIONS
+from services.analysis_cache import analysis_cache_key, get_analysis_cache
+from services.metrics import cv_context
+
+
+def _analyze_one(cv_text: str, identifier: str, cache_key: Optional[str],
+                 cv_name: str) -> Dict[str, Any]:
+    """Send a single CV to the API and cache the response if it succeeded."""
+    with cv_context(cv_name):
+        response = APIClient.create_chat(cv_text, identifier=identifier)
+
+    if cache_key is not None and "error" not in response:
+        get_analysis_cache().set(cache_key, json.dumps(response))
+
+    return response
+
+
+def analyze_cvs(
+    cv_texts: Sequence[str],
+    identifiers: Optional[Sequence[str]] = None,
+    max_workers: int = MAX_CONCURRENT_REQUESTS,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+    criteria_version: str = "",
+    use_cache: bool = ANALYSIS_CACHE_ENABLED,
+    cv_names: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """Analyze CV texts concurrently and return the API responses in input order.
+
+    At most ``max_workers`` requests are in flight at any time; the remaining CVs
+    wait in the executor queue until a slot frees up. ``on_result`` is called from
+    the calling thread with ``(index, response)`` as each request finishes, so it
+    is safe to update Streamlit widgets from it.
+
+    When ``use_cache`` is set, CVs already analyzed with the same text, revision ID,
+    ``criteria_version`` and chat payload settings are answered from the local analysis cache without an
+    API call; such responses carry ``"cached": True``.
+
+    ``cv_names`` (usually file names) key each CV's timing spans so they line up
+    with its extract and parse spans; the identifiers are used when omitted.
+    """
+    if identifiers is None:
+        identifiers = [f"cv_{i+1}" for i in range(len(cv_texts))]
+    if cv_names is None:
+        cv_names = identifiers
+
+    responses: List[Dict[str, Any]] = [{} for _ in cv_texts]
+    if not cv_texts:
+        return responses
+
+    cache = get_analysis_cache() if use_cache else None
+    pending = []
+
+    # Answer cache hits immediately and queue the rest for the API
+    for i, cv_text in enumerate(cv_texts):
+        cache_key = None
+        if cache is not None:
+            cache_key = analysis_cache_key(
+                cv_text, DEFAULT_REVISION_ID, criteria_version, CHAT_PAYLOAD_OPTIONS)
+            cached_value = cache.get(cache_key)
+            if cached_value is not None:
+                response = json.loads(cached_value)
+                response["cached"] = True
+                responses[i] = response
+                if on_result is not None:
+                    on_result(i, response)
+                continue
+
+        pending.append((i, cv_text, identifiers[i], cache_key, cv_names[i]))
+
+    if not pending:
+        return responses
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        # Each task runs in a copy of the caller's context so its spans keep the run ID
+        futures = {
+            executor.submit(contextvars.copy_context().run,
+                            _analyze_one, cv_text, identifier, cache_key, cv_name): i
+            for i, cv_text, identifier, cache_key, cv_name in pending
+        }
+
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                response = future.result()
+            except Exception as e:
+                response = {"error": str(e)}
+
+            responses[index] = response
+            if on_result is not None:
+                on_result(index, response)
+
+    return responses
@@ -1,15 +1,128 @@
 """
 API client for interacting with the FastAgent API.
 Handles authentication, CV submission, and feedback submission.
+Calls are rate limited, retried on transient failures and guarded by a circuit breaker.
 """
 
-import streamlit as st
-import requests
+import gzip
 import json
+import logging
 import uuid
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+import requests
+
+from config import (
+    API_BASE_URL,
+    API_USERNAME,
+    API_PASSWORD,
+    DEFAULT_REVISION_ID,
+    CHAT_NORMALIZE_TEXT,
+    CHAT_MAX_CHARS,
+    CHAT_SPLIT_PAGES,
+    API_GZIP_REQUESTS,
+    API_GZIP_MIN_BYTES
+)
+from services.http_session import get_session
+from services.metrics import metrics
+from services.resilience import RetryableAPIError, check_response, fastagent_policy
+from services.text_extraction import PAGE_BREAK
+from services.text_normalization import normalize_pages
+
+logger = logging.getLogger(__name__)
+
+# Basic authentication credentials, built once per process
+API_AUTH = (API_USERNAME, API_PASSWORD)
+
+# Settings that change the /chat payload built from a CV; part of the analysis cache key
+CHAT_PAYLOAD_OPTIONS = (f"normalize={CHAT_NORMALIZE_TEXT};max_chars={CHAT_MAX_CHARS};"
+                        f"split_pages={CHAT_SPLIT_PAGES}")
+
+# Set once the server has refused a gzip-encoded body, so later requests go uncompressed
+_gzip_refused = False
+
+
+def build_chat_request(cv_content: str, thread_id: Optional[str] = None, identifier: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """Build the URL and payload for a /chat request.
+
+    The CV text is normalized (CHAT_NORMALIZE_TEXT) and sent as Page_1, or with one
+    Page_N field per PDF page when CHAT_SPLIT_PAGES is set.
+    """
+    url = f"{API_BASE_URL}/chat"
+
+    pages = normalize_pages(cv_content) if CHAT_NORMALIZE_TEXT else cv_content.split(PAGE_BREAK)
+    if not CHAT_SPLIT_PAGES:
+        pages = ["\n\n".join(pages)]
+
+    # Format the CV content as required by the API
+    user_prompt_data = {
+        "revision_id": DEFAULT_REVISION_ID,
+        "identifier": identifier or str(uuid.uuid4())[:8]
+    }
+    user_prompt_data.update(
+        (f"Page_{number}", page) for number, page in enumerate(pages or [""], start=1))
+
+    # Convert the user_prompt_data to a JSON string
+    user_prompt_json = json.dumps(user_prompt_data)
+
+    payload = {
+        "thread_id": thread_id or str(uuid.uuid4()),
+        "conversation_flow": "hr_insights",
+        "user_prompt": user_prompt_json
+    }
+    return url, payload
+
 
-from config import API_BASE_URL, API_USERNAME, API_PASSWORD, DEFAULT_REVISION_ID
+def build_feedback_request(message_id: str, thread_id: str, positive: bool) -> Tuple[str, Dict[str, Any]]:
+    """Build the URL and payload for a feedback request."""
+    url = f"{API_BASE_URL}/messages/{message_id}/feedback"
+
+    payload = {
+        "thread_id": thread_id,
+        "message_id": message_id,
+        "user_id": "streamlit_user",
+        "positive_feedback": positive
+    }
+    return url, payload
+
+
+def encode_body(payload: Dict[str, Any]) -> Tuple[bytes, Dict[str, str]]:
+    """Serialize a JSON request body, gzip-compressing it when enabled and large enough."""
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if API_GZIP_REQUESTS and not _gzip_refused and len(body) >= API_GZIP_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
+
+
+def refused_gzip(status_code: int, headers: Dict[str, str]) -> bool:
+    """Return True, and stop compressing bodies, if the server refused a gzip-encoded request."""
+    global _gzip_refused
+    if status_code != 415 or headers.get("Content-Encoding") != "gzip":
+        return False
+
+    logger.warning("FastAgent API does not accept gzip request bodies; sending them uncompressed")
+    _gzip_refused = True
+    return True
+
+
+def _send(url: str, method: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Send one request and raise RetryableAPIError for transient failures."""
+    try:
+        # Use basic authentication over the pooled keep-alive session
+        body, headers = encode_body(payload)
+        response = get_session(url).request(
+            method, url, data=body, headers=headers, auth=API_AUTH)
+        if refused_gzip(response.status_code, headers):
+            body, headers = encode_body(payload)
+            response = get_session(url).request(
+                method, url, data=body, headers=headers, auth=API_AUTH)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        raise RetryableAPIError(str(e)) from e
+
+    check_response(response)
+    return response.json()
 
 
 class APIClient:
@@ -21,52 +134,23 @@ class APIClient:
     @classmethod
     def create_chat(cls, cv_content: str, thread_id: Optional[str] = None, identifier: Optional[str] = None) -> Dict[str, Any]:
         """Send a CV for analysis and get the results."""
-        url = f"{API_BASE_URL}/chat"
-
-        # Format the CV content as required by the API
-        user_prompt_data = {
-            "revision_id": DEFAULT_REVISION_ID,
-            "identifier": identifier or str(uuid.uuid4())[:8],
-            "Page_1": cv_content
-        }
-
-        # Convert the user_prompt_data to a JSON string
-        user_prompt_json = json.dumps(user_prompt_data)
-
-        payload = {
-            "thread_id": thread_id or str(uuid.uuid4()),
-            "conversation_flow": "hr_insights",
-            "user_prompt": user_prompt_json
-        }
+        url, payload = build_chat_request(cv_content, thread_id, identifier)
 
-        try:
-            # Use basic authentication from environment variables
-            auth = (API_USERNAME, API_PASSWORD)
-            response = requests.post(url, json=payload, auth=auth)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            st.error(f"API Error: {str(e)}")
-            return {"error": str(e)}
+        with metrics.span("create_chat", size=len(cv_content)) as span:
+            try:
+                return fastagent_policy.call(lambda: _send(url, "POST", payload))
+            except Exception as e:
+                logger.error("API Error: %s", e)
+                span.error = True
+                return {"error": str(e)}
 
     @classmethod
     def submit_feedback(cls, message_id: str, thread_id: str, positive: bool) -> Dict[str, Any]:
         """Submit feedback on an analysis."""
-        url = f"{API_BASE_URL}/messages/{message_id}/feedback"
-
-        payload = {
-            "thread_id": thread_id,
-            "message_id": message_id,
-            "user_id": "streamlit_user",
-            "positive_feedback": positive
-        }
+        url, payload = build_feedback_request(message_id, thread_id, positive)
 
         try:
-            # Use basic authentication
-            auth = (API_USERNAME, API_PASSWORD)
-            response = requests.put(url, json=payload, auth=auth)
-            response.raise_for_status()
-            return response.json()
+            return fastagent_policy.call(lambda: _send(url, "PUT", payload))
         except Exception as e:
-            st.error(f"API Error: {str(e)}")
+            logger.error("API Error: %s", e)
             return {"error": str(e)}
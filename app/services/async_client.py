@@ -0,0 +1,182 @@
+"""
+Asyncio client for the FastAgent API and Azure OpenAI.
+Mirrors APIClient and the summarizer so a single event loop can fan out many
+analyses over a bounded pool of connections, without a thread per request.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+from config import (
+    HTTP_TIMEOUT,
+    MAX_CONCURRENT_REQUESTS,
+    SUMMARY_MAX_TOKENS,
+    SUMMARY_MAX_WORKERS
+)
+from services.analysis_model import CandidateAnalysis
+from services.api_client import (
+    API_AUTH,
+    build_chat_request,
+    build_feedback_request,
+    encode_body,
+    refused_gzip
+)
+from services.metrics import cv_context, metrics
+from services.resilience import RetryableAPIError, check_response, fastagent_policy
+from services.openai_client import (
+    SummaryError,
+    advance_plan,
+    build_completion_request,
+    comparison_prompt_plan
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAPIClient:
+    """Async client for the FastAgent API and Azure OpenAI.
+
+    Use as an async context manager so the connection pool is closed afterwards:
+
+        async with AsyncAPIClient(max_connections=50) as client:
+            responses = await client.analyze_many(cv_texts)
+    """
+
+    def __init__(self, max_connections: int = MAX_CONCURRENT_REQUESTS, timeout: float = HTTP_TIMEOUT):
+        self.max_connections = max(1, max_connections)
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            timeout=httpx.Timeout(timeout)
+        )
+
+    async def __aenter__(self) -> "AsyncAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the underlying connection pool."""
+        await self._client.aclose()
+
+    async def create_chat(self, cv_content: str, thread_id: Optional[str] = None,
+                          identifier: Optional[str] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send a CV for analysis and get the results."""
+        url, payload = build_chat_request(cv_content, thread_id, identifier)
+
+        with metrics.span("create_chat", size=len(cv_content)) as span:
+            try:
+                return await fastagent_policy.call_async(
+                    lambda: self._send(url, "POST", payload, timeout))
+            except Exception as e:
+                logger.error("API Error: %s", e)
+                span.error = True
+                return {"error": str(e)}
+
+    async def submit_feedback(self, message_id: str, thread_id: str, positive: bool,
+                              timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Submit feedback on an analysis."""
+        url, payload = build_feedback_request(message_id, thread_id, positive)
+
+        try:
+            return await fastagent_policy.call_async(
+                lambda: self._send(url, "PUT", payload, timeout))
+        except Exception as e:
+            logger.error("API Error: %s", e)
+            return {"error": str(e)}
+
+    async def analyze_many(
+        self,
+        cv_texts: Sequence[str],
+        identifiers: Optional[Sequence[str]] = None,
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+        cv_names: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Analyze many CVs concurrently and return the responses in input order.
+
+        ``cv_names`` (file names) key each CV's timing spans; identifiers are used otherwise.
+        """
+        if identifiers is None:
+            identifiers = [f"cv_{i+1}" for i in range(len(cv_texts))]
+        if cv_names is None:
+            cv_names = identifiers
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_connections)
+
+        async def analyze(index: int) -> Dict[str, Any]:
+            async with semaphore:
+                # Each task runs in its own context, so this only tags this CV's spans
+                with cv_context(cv_names[index]):
+                    response = await self.create_chat(cv_texts[index], identifier=identifiers[index])
+            if on_result is not None:
+                on_result(index, response)
+            return response
+
+        return list(await asyncio.gather(*(analyze(i) for i in range(len(cv_texts)))))
+
+    async def summarize(self, analyses: List[CandidateAnalysis]) -> str:
+        """Summarize multiple CV analyses using Azure OpenAI."""
+        try:
+            prompt = await self._final_comparison_prompt(analyses)
+            return await self._chat_completion(prompt, SUMMARY_MAX_TOKENS)
+        except SummaryError:
+            return "Failed to generate summary. The API did not return expected content."
+        except Exception as e:
+            logger.error("Azure OpenAI API Error: %s", e)
+            return f"Error generating summary: {str(e)}"
+
+    def _timeout_kwargs(self, timeout: Optional[float]) -> Dict[str, Any]:
+        return {"timeout": httpx.Timeout(timeout)} if timeout is not None else {}
+
+    async def _send(self, url: str, method: str, payload: Dict[str, Any],
+                    timeout: Optional[float]) -> Dict[str, Any]:
+        """Send one FastAgent request and raise RetryableAPIError for transient failures."""
+        try:
+            body, headers = encode_body(payload)
+            response = await self._client.request(
+                method, url, content=body, headers=headers, auth=API_AUTH,
+                **self._timeout_kwargs(timeout))
+            if refused_gzip(response.status_code, headers):
+                body, headers = encode_body(payload)
+                response = await self._client.request(
+                    method, url, content=body, headers=headers, auth=API_AUTH,
+                    **self._timeout_kwargs(timeout))
+        except httpx.TransportError as e:
+            raise RetryableAPIError(str(e)) from e
+
+        check_response(response)
+        return response.json()
+
+    async def _chat_completion(self, prompt: str, max_tokens: int) -> str:
+        url, headers, payload = build_completion_request(prompt, max_tokens)
+
+        response = await self._client.post(url, headers=headers, json=payload)
+        response.raise_for_status()
+        response_data = response.json()
+
+        if "choices" in response_data and len(response_data["choices"]) > 0:
+            return response_data["choices"][0]["message"]["content"]
+        raise SummaryError("The API did not return expected content.")
+
+    async def _final_comparison_prompt(self, analyses: List[CandidateAnalysis]) -> str:
+        """Run the shared digest and map-reduce plan with at most SUMMARY_MAX_WORKERS calls in flight."""
+        semaphore = asyncio.Semaphore(max(1, SUMMARY_MAX_WORKERS))
+
+        async def complete(prompt: str, max_tokens: int) -> str:
+            async with semaphore:
+                return await self._chat_completion(prompt, max_tokens)
+
+        plan = comparison_prompt_plan(analyses)
+        # Advancing the plan reads and writes the SQLite digest cache, so keep it off the event loop
+        requests, prompt = await asyncio.to_thread(advance_plan, plan)
+        while requests is not None:
+            results = await asyncio.gather(*(complete(*request) for request in requests))
+            requests, prompt = await asyncio.to_thread(advance_plan, plan, list(results))
+        return prompt
@@ -2,21 +2,63 @@
 Azure Blob Storage client for uploading and downloading files.
 """
 
-import streamlit as st
-from typing import Optional
-from urllib.parse import urlparse
-from azure.storage.blob import BlobServiceClient, ContentSettings
-
-from config import AZURE_BLOB_STORAGE_URL
+import logging
+import mimetypes
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import unquote, urlparse
+from azure.core.exceptions import HttpResponseError, ResourceExistsError
+from azure.storage.blob import BlobClient, BlobServiceClient, ContentSettings
+
+from config import (
+    AZURE_BLOB_STORAGE_URL,
+    AZURE_STORAGE_CONNECTION_STRING,
+    AZURE_BLOB_CONTAINER,
+    AZURE_JOB_CRITERIA_BLOB,
+    BLOB_CHUNK_SIZE_BYTES,
+    BLOB_MAX_CONCURRENCY,
+    BLOB_TRANSFER_WORKERS
+)
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _transfer_options(chunk_size: int) -> Dict[str, int]:
+    """Client options that split transfers larger than one chunk into parallel blocks."""
+    return {
+        "max_block_size": chunk_size,
+        "max_single_put_size": chunk_size,
+        "max_chunk_get_size": chunk_size,
+        "max_single_get_size": chunk_size
+    }
 
 
 class AzureBlobClient:
-    """Client for interacting with Azure Blob Storage using a full URL with SAS token."""
+    """Client for interacting with Azure Blob Storage using a full URL with SAS token.
+
+    The URL has the form ``https://<account>/<container>[/<blob>]?<sas>``. When it
+    names a blob, that blob is available as ``default_blob``.
 
-    def __init__(self):
-        # Get the full URL from environment variable
-        self.full_url = os.getenv("AZURE_BLOB_STORAGE_URL", "")
+    Alternatively, pass a connection string (for example for a local Azurite
+    emulator); the container and default blob then come from the configuration.
+    """
+
+    def __init__(self, full_url: str = AZURE_BLOB_STORAGE_URL, connection_string: Optional[str] = None,
+                 chunk_size: int = BLOB_CHUNK_SIZE_BYTES):
+        self.full_url = full_url
+        self._blob_clients: Dict[str, BlobClient] = {}
+        self._lock = threading.Lock()
+
+        if connection_string:
+            self.container_name = AZURE_BLOB_CONTAINER
+            self.default_blob_name = AZURE_JOB_CRITERIA_BLOB or None
+            self.blob_service_client = BlobServiceClient.from_connection_string(
+                connection_string, **_transfer_options(chunk_size))
+            self.account_url = self.blob_service_client.url
+            return
 
         # Check if URL is provided
         if not self.full_url:
@@ -24,131 +66,212 @@ class AzureBlobClient:
                 "AZURE_BLOB_STORAGE_URL environment variable is not set or is empty")
 
         # Parse the URL to extract components
-        try:
-            from urllib.parse import urlparse, parse_qs
+        parsed_url = urlparse(self.full_url)
 
-            parsed_url = urlparse(self.full_url)
-            st.debug(f"Parsed URL: {parsed_url}")
-
-            # The path starts with a /, so split and filter empty strings
-            path_parts = [part for part in parsed_url.path.split('/') if part]
-            st.debug(f"Path parts: {path_parts}")
-
-            if len(path_parts) < 1:
-                raise ValueError("URL does not contain container information")
+        # The path starts with a /, so split and filter empty strings
+        path_parts = [part for part in parsed_url.path.split('/') if part]
+        if len(path_parts) < 1:
+            raise ValueError(
+                "Failed to parse Blob Storage URL: URL does not contain container information")
 
-            self.container_name = path_parts[0]
-            st.debug(f"Container name: {self.container_name}")
+        self.container_name = path_parts[0]
+        self.default_blob_name = unquote("/".join(path_parts[1:])) or None
+        self.account_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        self.sas_token = parsed_url.query.lstrip('?')
 
-            # Extract the base URL without path and query
-            self.account_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-            st.debug(f"Account URL: {self.account_url}")
+        # Check if SAS token appears to be valid
+        if not self.sas_token.startswith('sv='):
+            logger.warning(
+                "SAS token doesn't appear to be in the expected format")
 
-            # Get the SAS token from the query string
-            self.sas_token = parsed_url.query
-            st.debug(f"SAS token length: {len(self.sas_token)}")
+        # One service client, and so one HTTP pipeline, is shared by every blob client
+        try:
+            self.blob_service_client = BlobServiceClient(
+                account_url=self.account_url,
+                credential=self.sas_token or None,
+                **_transfer_options(chunk_size)
+            )
+        except Exception as e:
+            raise ValueError(f"Failed to create BlobServiceClient: {str(e)}")
 
-            # Check if SAS token appears to be valid
-            if not self.sas_token.startswith('sv=') and not self.sas_token.startswith('?sv='):
-                st.warning(
-                    "SAS token doesn't appear to be in the expected format")
+        logger.debug("Created blob client for container %s at %s",
+                     self.container_name, self.account_url)
 
-            # Create a direct connection to the blob service
-            try:
-                # Alternative 1: Use BlobServiceClient
-                self.blob_service_client = BlobServiceClient(
-                    f"{self.account_url}?{self.sas_token}"
+    def get_blob_client(self, blob_name: str) -> BlobClient:
+        """Return a cached client for a blob in the container."""
+        with self._lock:
+            blob_client = self._blob_clients.get(blob_name)
+            if blob_client is None:
+                blob_client = self.blob_service_client.get_blob_client(
+                    container=self.container_name,
+                    blob=blob_name
                 )
-                st.success(
-                    "Successfully created BlobServiceClient using direct URL")
-            except Exception as e1:
-                st.error(
-                    f"Failed to create BlobServiceClient using direct URL: {str(e1)}")
-                st.info("Trying alternative connection method...")
-
-                try:
-                    # Alternative 2: Use from_connection_string
-                    self.blob_service_client = BlobServiceClient.from_connection_string(
-                        f"BlobEndpoint={self.account_url};SharedAccessSignature={self.sas_token}"
-                    )
-                    st.success(
-                        "Successfully created BlobServiceClient using connection string")
-                except Exception as e2:
-                    st.error(
-                        f"Failed to create BlobServiceClient using connection string: {str(e2)}")
-
-                    # Alternative 3: Try another format
-                    try:
-                        # Remove any leading ? from SAS token if present
-                        clean_sas = self.sas_token[1:] if self.sas_token.startswith(
-                            '?') else self.sas_token
-                        self.blob_service_client = BlobServiceClient(
-                            f"{self.account_url}?{clean_sas}"
-                        )
-                        st.success(
-                            "Successfully created BlobServiceClient using cleaned SAS token")
-                    except Exception as e3:
-                        raise ValueError(
-                            f"All connection attempts failed: {str(e3)}")
+                self._blob_clients[blob_name] = blob_client
+            return blob_client
 
-        except Exception as e:
-            raise ValueError(f"Failed to parse Blob Storage URL: {str(e)}")
+    @property
+    def default_blob(self) -> BlobClient:
+        """Client for the blob named in the configured URL."""
+        if self.default_blob_name is None:
+            raise ValueError("AZURE_BLOB_STORAGE_URL does not name a blob")
+        return self.get_blob_client(self.default_blob_name)
 
     def upload_blob(self, content: str, blob_name: str, content_type: str = "application/json") -> bool:
         """Upload content to Azure Blob Storage."""
-        try:
-            st.info(
-                f"Attempting to upload blob: {blob_name} to container: {self.container_name}")
+        with metrics.span("blob_upload", size=len(content), cv=blob_name) as span:
+            try:
+                logger.info("Uploading blob %s to container %s",
+                            blob_name, self.container_name)
 
-            # Get a client to interact with the specified blob
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-            st.info(
-                f"Created blob client for: {blob_client.url.split('?')[0]}")
-
-            # Set the content type
-            content_settings = ContentSettings(content_type=content_type)
-
-            # Upload the content
-            st.info("Starting upload...")
-            upload_result = blob_client.upload_blob(
-                content,
-                overwrite=True,
-                content_settings=content_settings
-            )
-            st.success(f"Upload completed successfully: {upload_result}")
-            return True
-        except Exception as e:
-            st.error(f"Azure Blob Error during upload: {str(e)}")
-            import traceback
-            st.error(f"Traceback: {traceback.format_exc()}")
-            return False
+                # Set the content type
+                content_settings = ContentSettings(content_type=content_type)
+
+                # Upload the content
+                self.get_blob_client(blob_name).upload_blob(
+                    content,
+                    overwrite=True,
+                    content_settings=content_settings
+                )
+                return True
+            except Exception:
+                logger.exception("Azure Blob Error during upload of %s", blob_name)
+                span.error = True
+                return False
 
     def download_blob(self, blob_name: str) -> Optional[str]:
         """Download content from Azure Blob Storage."""
+        with metrics.span("blob_download", cv=blob_name) as span:
+            try:
+                logger.info("Downloading blob %s from container %s",
+                            blob_name, self.container_name)
+
+                # Download the blob content
+                download_stream = self.get_blob_client(blob_name).download_blob()
+                content = download_stream.readall()
+                span.size = len(content)
+                return content.decode('utf-8')
+            except Exception:
+                logger.exception(
+                    "Azure Blob Error during download of %s", blob_name)
+                span.error = True
+                return None
+
+    def upload_file(self, path: str, blob_name: Optional[str] = None,
+                    max_concurrency: int = BLOB_MAX_CONCURRENCY) -> bool:
+        """Stream a local file to a blob, uploading its blocks in parallel."""
+        blob_name = blob_name or os.path.basename(path)
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        with metrics.span("blob_upload", cv=blob_name) as span:
+            try:
+                span.size = os.path.getsize(path)
+                with open(path, "rb") as f:
+                    self.get_blob_client(blob_name).upload_blob(
+                        f,
+                        overwrite=True,
+                        content_settings=ContentSettings(content_type=content_type),
+                        max_concurrency=max_concurrency
+                    )
+                return True
+            except Exception:
+                logger.exception("Azure Blob Error during upload of %s", path)
+                span.error = True
+                return False
+
+    def download_file(self, blob_name: str, path: str,
+                      max_concurrency: int = BLOB_MAX_CONCURRENCY) -> bool:
+        """Stream a blob to a local file, downloading its chunks in parallel."""
+        with metrics.span("blob_download", cv=blob_name) as span:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(path, "wb") as f:
+                    span.size = self.get_blob_client(blob_name).download_blob(
+                        max_concurrency=max_concurrency).readinto(f)
+                return True
+            except Exception:
+                logger.exception("Azure Blob Error during download of %s", blob_name)
+                span.error = True
+                return False
+
+    def ensure_container(self):
+        """Create the container if it does not exist yet (e.g. on a fresh emulator)."""
         try:
-            st.info(
-                f"Attempting to download blob: {blob_name} from container: {self.container_name}")
+            self.blob_service_client.create_container(self.container_name)
+        except ResourceExistsError:
+            pass
+        except HttpResponseError as e:
+            # A SAS scoped to the container may not be allowed to create it
+            logger.warning("Could not create container %s: %s",
+                           self.container_name, e.message)
 
-            # Get a client to interact with the specified blob
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-            st.info(
-                f"Created blob client for: {blob_client.url.split('?')[0]}")
+    def list_blob_names(self, prefix: Optional[str] = None) -> List[str]:
+        """Return the names of the blobs in the container, optionally under a prefix."""
+        container_client = self.blob_service_client.get_container_client(
+            self.container_name)
+        return list(container_client.list_blob_names(name_starts_with=prefix))
 
-            # Download the blob content
-            st.info("Starting download...")
-            download_stream = blob_client.download_blob()
-            content = download_stream.readall().decode('utf-8')
-            st.success("Download completed successfully")
+    def upload_files(self, paths: Sequence[str], prefix: str = "", base_dir: Optional[str] = None,
+                     workers: int = BLOB_TRANSFER_WORKERS) -> Dict[str, bool]:
+        """Upload many local files under a blob name prefix; returns path -> success.
 
-            return content
-        except Exception as e:
-            st.error(f"Azure Blob Error during download: {str(e)}")
-            import traceback
-            st.error(f"Traceback: {traceback.format_exc()}")
-            return None
+        Files inside ``base_dir`` keep their path relative to it, so files with the
+        same name in different subdirectories do not overwrite each other; other
+        files are stored by file name.
+        """
+        def upload(path: str) -> bool:
+            name = os.path.basename(path)
+            if base_dir is not None:
+                relative_path = os.path.relpath(path, base_dir)
+                if not relative_path.startswith(os.pardir):
+                    name = relative_path.replace(os.sep, "/")
+            return self.upload_file(path, "/".join(part for part in (prefix.strip("/"), name) if part))
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            return dict(zip(paths, executor.map(upload, paths)))
+
+    def download_blobs(self, blob_names: Sequence[str], destination_dir: str, prefix: str = "",
+                       workers: int = BLOB_TRANSFER_WORKERS) -> Dict[str, bool]:
+        """Download many blobs into a directory, dropping ``prefix`` from their names; returns name -> success.
+
+        Blobs whose names would resolve outside ``destination_dir`` are not downloaded
+        and reported as failed.
+        """
+        root = os.path.realpath(destination_dir)
+
+        def download(blob_name: str) -> bool:
+            relative_name = blob_name[len(prefix):] if blob_name.startswith(prefix) else blob_name
+            relative_name = relative_name.lstrip("/")
+            target = os.path.realpath(os.path.join(root, relative_name))
+            # Names with ".." segments (or symlinks) must not escape the destination
+            if target == root or os.path.commonpath([root, target]) != root:
+                logger.error("Refusing to download blob %s outside %s", blob_name, destination_dir)
+                return False
+            return self.download_file(blob_name, target)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            return dict(zip(blob_names, executor.map(download, blob_names)))
+
+
+_blob_client: Optional[AzureBlobClient] = None
+_blob_client_lock = threading.Lock()
+
+
+def get_azure_blob_client() -> AzureBlobClient:
+    """Return the process-wide blob client, creating it on first use.
+
+    Uses AZURE_STORAGE_CONNECTION_STRING when it is set, otherwise
+    AZURE_BLOB_STORAGE_URL. Raises ValueError if neither is usable.
+    """
+    global _blob_client
+    if _blob_client is None:
+        with _blob_client_lock:
+            if _blob_client is None:
+                _blob_client = AzureBlobClient(
+                    connection_string=AZURE_STORAGE_CONNECTION_STRING)
+    return _blob_client
+
+
+def is_blob_storage_configured() -> bool:
+    """Whether a blob storage URL or connection string is configured."""
+    return bool(AZURE_STORAGE_CONNECTION_STRING or AZURE_BLOB_STORAGE_URL)
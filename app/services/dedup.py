@@ -0,0 +1,156 @@
+"""
+Duplicate and near-duplicate CV detection.
+Exact copies are found by hashing normalized text; near-duplicates (the same
+resume as PDF and DOCX, or resubmitted with small edits) by MinHash signatures
+of word shingles, bucketed with locality-sensitive hashing so a batch is not
+compared pair by pair.
+"""
+
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_SHINGLE_SIZE
+from services.text_extraction import is_extraction_failure
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Mersenne prime modulus of the MinHash permutations; multipliers stay below 2**31
+# so (a * x + b) never overflows uint64 for 32-bit shingle hashes
+_PRIME = np.uint64((1 << 61) - 1)
+
+_rng = np.random.default_rng(20240531)
+_PERM_A = _rng.integers(1, 1 << 31, size=DEDUP_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 61) - 1, size=DEDUP_NUM_PERM, dtype=np.uint64)
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case the text and reduce it to words separated by single spaces."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def text_fingerprint(text: str) -> str:
+    """Hash of the normalized text; equal for copies that differ only in case, punctuation or layout."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def minhash_signature(text: str, shingle_size: int = DEDUP_SHINGLE_SIZE) -> np.ndarray:
+    """MinHash signature of the word shingles of a text."""
+    words = normalize_text(text).split()
+    shingles = {" ".join(words[i:i + shingle_size])
+                for i in range(max(1, len(words) - shingle_size + 1))}
+    hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+                         dtype=np.uint64, count=len(shingles))
+    return ((hashes[:, None] * _PERM_A + _PERM_B) % _PRIME).min(axis=0)
+
+
+def _has_content(text: str, shingle_size: int = DEDUP_SHINGLE_SIZE) -> bool:
+    # Too little text to tell one CV from another
+    return len(normalize_text(text).split()) >= shingle_size
+
+
+def _lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick (bands, rows) whose collision threshold (1/b)^(1/r) sits just below ``threshold``."""
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        # Aim a little low so pairs near the threshold become candidates and are then verified
+        error = abs((1 / bands) ** (1 / rows) - threshold * 0.9)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class DuplicateIndex:
+    """Incremental duplicate detection over texts added one at a time.
+
+    Keeps the fingerprints, MinHash signatures and LSH buckets of every text added,
+    so texts extracted in separate chunks are still matched against each other.
+    Groups are rooted at the first copy added.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self._bands, self._rows = _lsh_bands(DEDUP_NUM_PERM, threshold)
+        self._parents: Dict[Hashable, Hashable] = {}
+        self._order: Dict[Hashable, int] = {}
+        self._fingerprints: Dict[str, Hashable] = {}
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[Hashable]] = defaultdict(list)
+
+    def add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """Add a text under a unique key and return the key of the first copy it duplicates, if any.
+
+        Failed extractions and texts shorter than one shingle (such as scanned PDFs
+        without a text layer) are never matched.
+        """
+        if is_extraction_failure(text) or not _has_content(text):
+            return None
+        self._parents[key] = key
+        self._order[key] = len(self._order)
+
+        # Exact copies first; only one copy of each needs a signature
+        fingerprint = text_fingerprint(text)
+        if fingerprint in self._fingerprints:
+            self._union(self._fingerprints[fingerprint], key)
+        else:
+            self._fingerprints[fingerprint] = key
+            signature = minhash_signature(text)
+            self._signatures[key] = signature
+            for band in range(self._bands):
+                bucket = self._buckets[
+                    (band, signature[band * self._rows:(band + 1) * self._rows].tobytes())]
+                for other in bucket:
+                    # Texts already in one group need no comparison
+                    if self._find(other) == self._find(key):
+                        continue
+                    if np.mean(self._signatures[other] == signature) >= self.threshold:
+                        self._union(other, key)
+                bucket.append(key)
+
+        first = self._find(key)
+        return None if first == key else first
+
+    def first_copy(self, key: Hashable) -> Hashable:
+        """Key of the first copy in the group of ``key``; ``key`` itself if it was not grouped."""
+        return self._find(key) if key in self._parents else key
+
+    def _find(self, key: Hashable) -> Hashable:
+        parents = self._parents
+        while parents[key] != key:
+            parents[key] = parents[parents[key]]
+            key = parents[key]
+        return key
+
+    def _union(self, a: Hashable, b: Hashable):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            # Keep the earliest text added as the root
+            if self._order[root_a] > self._order[root_b]:
+                root_a, root_b = root_b, root_a
+            self._parents[root_b] = root_a
+
+
+def group_duplicates(cv_texts: Sequence[str], threshold: float = DEDUP_THRESHOLD) -> List[List[int]]:
+    """Group the indices of duplicate CVs, in upload order.
+
+    Each group starts with its first occurrence, which is the copy to analyze.
+    Texts whose estimated Jaccard similarity is at least ``threshold`` are grouped.
+    Failed extractions and texts shorter than one shingle (such as scanned PDFs
+    without a text layer) are never grouped.
+    """
+    index = DuplicateIndex(threshold)
+    for i, text in enumerate(cv_texts):
+        index.add(i, text)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(cv_texts)):
+        groups[index.first_copy(i)].append(i)
+    return sorted(groups.values(), key=lambda group: group[0])
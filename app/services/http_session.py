@@ -0,0 +1,68 @@
+"""
+Shared HTTP transport for the CV Analysis Tool.
+Provides pooled, keep-alive sessions per host that are reused across reruns and user sessions.
+"""
+
+import threading
+from typing import Dict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import HTTP_POOL_SIZE, HTTP_TIMEOUT
+
+# One session per scheme://host, shared by the whole process
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+class TimeoutSession(requests.Session):
+    """Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+def _create_session(pool_size: int, timeout: float) -> requests.Session:
+    """Create a keep-alive session with a connection pool sized for concurrent use."""
+    session = TimeoutSession(timeout=timeout)
+
+    # Retries are left to the caller; the adapter only manages pooling
+    adapter = HTTPAdapter(pool_connections=1,
+                          pool_maxsize=pool_size, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session(url: str, pool_size: int = HTTP_POOL_SIZE, timeout: float = HTTP_TIMEOUT) -> requests.Session:
+    """Return the pooled session for the host of the given URL, creating it on first use."""
+    parsed_url = urlparse(url)
+    host_key = f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+    session = _sessions.get(host_key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        # Another thread may have created it while we waited for the lock
+        session = _sessions.get(host_key)
+        if session is None:
+            session = _create_session(pool_size, timeout)
+            _sessions[host_key] = session
+        return session
+
+
+def close_sessions():
+    """Close all pooled sessions and release their connections."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
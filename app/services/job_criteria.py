@@ -0,0 +1,142 @@
+"""
+ETag-aware cache of the job criteria blob.
+The last known ETag, content hash and content are kept locally, so checks cost
+a HEAD request, unchanged downloads are skipped with If-None-Match and
+uploads of identical criteria are skipped entirely.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError
+
+from services.analysis_cache import AnalysisCache
+from services.blob_storage import get_azure_blob_client, is_blob_storage_configured
+
+logger = logging.getLogger(__name__)
+
+
+def criteria_hash(job_criteria: Dict[str, Any]) -> str:
+    """Content hash of the job criteria, independent of key order and formatting."""
+    canonical = json.dumps(job_criteria, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class JobCriteriaCache:
+    """Local copy of the job criteria blob, kept in step with the blob's ETag."""
+
+    def __init__(self, cache: Optional[AnalysisCache] = None):
+        # No TTL or size limit: a single entry that is only ever replaced
+        self._cache = cache or AnalysisCache(
+            namespace="job_criteria", ttl_seconds=0, max_entries=0)
+        self._lock = threading.Lock()
+        self._state: Optional[Dict[str, Any]] = None
+
+    def _blob(self):
+        return get_azure_blob_client().default_blob
+
+    def _cache_key(self) -> str:
+        # Key on the blob location without the SAS token, which may rotate
+        return self._blob().url.split('?')[0]
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        if self._state is None:
+            value = self._cache.get(self._cache_key())
+            self._state = json.loads(value) if value is not None else None
+        return self._state
+
+    def _save_state(self, etag: str, job_criteria: Dict[str, Any]):
+        self._state = {"etag": etag, "hash": criteria_hash(job_criteria),
+                       "criteria": job_criteria}
+        self._cache.set(self._cache_key(), json.dumps(self._state))
+
+    def get_version(self) -> str:
+        """Return the current ETag of the job criteria blob (a HEAD request)."""
+        return self._blob().get_blob_properties().etag or ""
+
+    def get_criteria(self) -> Dict[str, Any]:
+        """Return the job criteria, downloading them only if the blob has changed."""
+        with self._lock:
+            state = self._load_state()
+            kwargs = {}
+            if state is not None:
+                kwargs = {"etag": state["etag"],
+                          "match_condition": MatchConditions.IfModified}
+
+            try:
+                downloader = self._blob().download_blob(**kwargs)
+            except HttpResponseError as e:
+                # The storage SDK reports 304 Not Modified as a generic response error
+                if e.status_code != 304 or state is None:
+                    raise
+                logger.debug("Job criteria unchanged (ETag %s)", state["etag"])
+                return state["criteria"]
+
+            job_criteria = json.loads(downloader.readall())
+            self._save_state(downloader.properties.etag, job_criteria)
+            return job_criteria
+
+    def update(self, job_criteria: Dict[str, Any]) -> bool:
+        """Upload the job criteria unless the blob already holds identical content.
+
+        Returns True if the blob was written and False if the upload was skipped.
+        """
+        with self._lock:
+            state = self._load_state()
+
+            # Identical content is only skipped if nobody changed the blob since we last saw it
+            if state is not None and state["hash"] == criteria_hash(job_criteria) \
+                    and self.get_version() == state["etag"]:
+                logger.info("Job criteria unchanged; skipping upload")
+                return False
+
+            response = self._blob().upload_blob(
+                json.dumps(job_criteria, indent=2), overwrite=True)
+            self._save_state(response["etag"], job_criteria)
+            logger.info("Job criteria updated (ETag %s)", response["etag"])
+            return True
+
+
+_job_criteria_cache: Optional[JobCriteriaCache] = None
+_job_criteria_cache_lock = threading.Lock()
+
+
+def get_job_criteria_cache() -> JobCriteriaCache:
+    """Return the process-wide job criteria cache, creating it on first use."""
+    global _job_criteria_cache
+    if _job_criteria_cache is None:
+        with _job_criteria_cache_lock:
+            if _job_criteria_cache is None:
+                _job_criteria_cache = JobCriteriaCache()
+    return _job_criteria_cache
+
+
+def get_job_criteria_version() -> str:
+    """Return the current version (ETag) of the job criteria blob, or an empty string if unavailable.
+
+    Downstream caches key on this so they are invalidated when the criteria change.
+    """
+    if not is_blob_storage_configured():
+        return ""
+
+    try:
+        return get_job_criteria_cache().get_version()
+    except Exception:
+        logger.warning("Could not read the job criteria version", exc_info=True)
+        return ""
+
+
+def get_job_criteria_text() -> str:
+    """Return the job criteria text from blob storage, or an empty string if unavailable."""
+    if not is_blob_storage_configured():
+        return ""
+
+    try:
+        return get_job_criteria_cache().get_criteria().get("job_criteria_text", "")
+    except Exception:
+        logger.warning("Could not read the job criteria", exc_info=True)
+        return ""
@@ -0,0 +1,302 @@
+"""
+Background job queue for CV analysis runs.
+Jobs run on a bounded worker pool shared by every session in the process, and
+their status is kept in a SQLite table so the UI can poll progress across reruns.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import (
+    JOB_WORKERS,
+    MAX_CONCURRENT_REQUESTS,
+    RESULTS_DB_PATH,
+    DEDUP_ENABLED,
+    PRESCREEN_ENABLED,
+    PRESCREEN_MIN_SCORE
+)
+from services.analysis_cache import cv_text_hash
+from services.analysis_model import parse_analysis
+from services.analysis_pipeline import analyze_cvs
+from services.dedup import group_duplicates
+from services.metrics import metrics, run_context
+from services.prescreen import prescreen
+from services.results_store import get_results_store
+from services.text_extraction import extract_texts_from_files, is_extraction_failure
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+# A job that was queued or running when its process stopped
+JOB_INTERRUPTED = "interrupted"
+
+ACTIVE_JOB_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+# Job messages written by the analysis stage, which a resumed job retries
+_ANALYSIS_ERROR_PREFIXES = ("Error analyzing ", "Analysis job failed: ")
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        total INTEGER NOT NULL,
+        completed INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0,
+        errors TEXT NOT NULL DEFAULT '[]',
+        submitted_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)"
+]
+
+
+class JobQueue:
+    """Runs analysis jobs on a worker pool and records their progress.
+
+    The job ID is the ID of the run its results are written to in the results store.
+    """
+
+    def __init__(self, path: str = RESULTS_DB_PATH, max_workers: int = JOB_WORKERS):
+        self.path = path
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="analysis-job")
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            # Jobs still marked active were abandoned by a previous process
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE status IN (?, ?)",
+                (JOB_INTERRUPTED, time.time(), *ACTIVE_JOB_STATES)
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, uploaded_files, criteria_version: str = "", criteria_text: str = "") -> str:
+        """Queue an analysis of the given files and return the job (run) ID at once.
+
+        With ``criteria_text``, the CVs are pre-screened against it: they are analyzed
+        best match first, and those scoring below PRESCREEN_MIN_SCORE are skipped.
+        """
+        job_id = get_results_store().create_run(len(uploaded_files))
+
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, status, total, submitted_at) VALUES (?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, len(uploaded_files), time.time())
+            )
+
+        # The job holds its own references to the files, so it does not depend on the session
+        self._executor.submit(
+            self._run, job_id, list(uploaded_files), criteria_version, criteria_text)
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the status of a job, or None if it is unknown."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT job_id, status, total, completed, failed, errors, "
+                "submitted_at, started_at, finished_at FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        keys = ("job_id", "status", "total", "completed", "failed", "errors",
+                "submitted_at", "started_at", "finished_at")
+        job = dict(zip(keys, row))
+        job["errors"] = json.loads(job["errors"])
+        return job
+
+    def _update(self, job_id: str, **fields: Any):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                         (*fields.values(), job_id))
+
+    def resume(self, job_id: str, criteria_version: str = "") -> int:
+        """Re-submit the failed and missing items of a finished job and return how many were queued."""
+        job = self.get_job(job_id)
+        if job is None or job["status"] in ACTIVE_JOB_STATES:
+            return 0
+
+        store = get_results_store()
+        items = store.get_unfinished_items(job_id)
+        if not items:
+            return 0
+
+        # The summary no longer covers every candidate once more results arrive
+        store.save_summary(job_id, None)
+        # Unreadable and pre-screened CVs are not retried, so their messages stay
+        errors = [error for error in job["errors"]
+                  if not error.startswith(_ANALYSIS_ERROR_PREFIXES)]
+        self._update(job_id, status=JOB_QUEUED, completed=store.count_results(job_id),
+                     failed=0, errors=json.dumps(errors), finished_at=None)
+        self._executor.submit(self._run_items, job_id, items, criteria_version)
+        return len(items)
+
+    def _run(self, job_id: str, uploaded_files: List, criteria_version: str, criteria_text: str):
+        """Extract the text of every file, journal it and analyze it."""
+        try:
+            self._update(job_id, status=JOB_RUNNING, started_at=time.time())
+            items = self._prepare_items(job_id, uploaded_files, criteria_text)
+        except Exception as e:
+            self._fail(job_id, [], e)
+            return
+
+        self._run_items(job_id, items, criteria_version)
+
+    def _prepare_items(self, job_id: str, uploaded_files: List, criteria_text: str) -> List[Dict[str, Any]]:
+        """Extract, de-duplicate and journal the uploaded files, returning the items to analyze."""
+        with run_context(job_id):
+            cv_texts = extract_texts_from_files(uploaded_files)
+
+        groups = [[i] for i in range(len(cv_texts))]
+        if DEDUP_ENABLED:
+            with run_context(job_id), metrics.span("dedup", size=len(cv_texts)):
+                groups = group_duplicates(cv_texts)
+
+        # Duplicates are analyzed once, as the first copy uploaded, and linked to every copy
+        items = [{"position": group[0], "cv_name": uploaded_files[group[0]].name,
+                  "cv_hash": cv_text_hash(cv_texts[group[0]]), "cv_text": cv_texts[group[0]],
+                  "source_files": [uploaded_files[i].name for i in group]}
+                 for group in groups]
+        store = get_results_store()
+        if len(items) < len(uploaded_files):
+            logger.info("Job %s: collapsed %d duplicate CVs", job_id,
+                        len(uploaded_files) - len(items))
+            store.set_run_total(job_id, len(items))
+            self._update(job_id, total=len(items))
+
+        # Checkpoint the extracted text so the run can be resumed without the uploads
+        store.journal_items(
+            job_id, [(item["position"], item["cv_name"], item["cv_hash"], item["cv_text"],
+                      item["source_files"]) for item in items])
+
+        # Files whose text could not be extracted are reported instead of sent for analysis
+        unreadable = [item for item in items if is_extraction_failure(item["cv_text"])]
+        if unreadable:
+            store.mark_items_skipped(
+                job_id, [(item["position"], item["cv_text"]) for item in unreadable])
+            items = [item for item in items if not is_extraction_failure(item["cv_text"])]
+            self._update(job_id, total=len(items), errors=json.dumps(self._errors(job_id) + [
+                f"Could not read {item['cv_name']}: {item['cv_text']}" for item in unreadable]))
+
+        if criteria_text and PRESCREEN_ENABLED:
+            items = self._prescreen(job_id, items, criteria_text)
+        return items
+
+    def _prescreen(self, job_id: str, items: List[Dict[str, Any]], criteria_text: str) -> List[Dict[str, Any]]:
+        """Order items best match first and checkpoint those below the threshold as skipped."""
+        with run_context(job_id), metrics.span("prescreen", size=len(items)):
+            queued, skipped = prescreen(
+                [item["cv_text"] for item in items], criteria_text)
+
+        if skipped:
+            get_results_store().mark_items_skipped(
+                job_id, [(items[i]["position"], f"Pre-screen score {score:.2f} below {PRESCREEN_MIN_SCORE:.2f}")
+                         for i, score in skipped])
+            names = ", ".join(items[i]["cv_name"] for i, _ in skipped)
+            self._update(job_id, total=len(queued), errors=json.dumps(self._errors(job_id) + [
+                f"Skipped {len(skipped)} CVs scoring below the pre-screen threshold: {names}"]))
+            logger.info("Job %s: pre-screening skipped %d of %d CVs",
+                        job_id, len(skipped), len(items))
+
+        return [items[i] for i in queued]
+
+    def _run_items(self, job_id: str, items: List[Dict[str, Any]], criteria_version: str):
+        """Analyze journaled items, checkpointing each one as it completes or fails."""
+        completed = 0
+        failed = 0
+        errors: List[str] = []
+
+        try:
+            self._update(job_id, status=JOB_RUNNING, started_at=time.time())
+            store = get_results_store()
+            job = self.get_job(job_id)
+            completed = job["completed"]
+            # Keep messages recorded before analysis started, such as skipped CVs
+            errors = list(job["errors"])
+
+            def on_result(index: int, response: Dict[str, Any]):
+                nonlocal completed, failed
+                item = items[index]
+                if "error" in response:
+                    failed += 1
+                    errors.append(
+                        f"Error analyzing {item['cv_name']}: {response['error']}")
+                    store.mark_item_failed(
+                        job_id, item["position"], str(response["error"]))
+                else:
+                    completed += 1
+                    store.add_result(job_id, item["position"],
+                                     parse_analysis(item["cv_name"], response, item["source_files"]),
+                                     cv_hash=item["cv_hash"])
+                self._update(job_id, completed=completed, failed=failed,
+                             errors=json.dumps(errors))
+
+            with run_context(job_id):
+                analyze_cvs(
+                    [item["cv_text"] for item in items],
+                    identifiers=[f"cv_{item['position']+1}" for item in items],
+                    max_workers=MAX_CONCURRENT_REQUESTS,
+                    on_result=on_result,
+                    criteria_version=criteria_version,
+                    cv_names=[item["cv_name"] for item in items]
+                )
+        except Exception as e:
+            self._fail(job_id, errors, e)
+            return
+
+        self._update(job_id, status=JOB_COMPLETED, finished_at=time.time())
+
+    def _errors(self, job_id: str) -> List[str]:
+        job = self.get_job(job_id)
+        return list(job["errors"]) if job is not None else []
+
+    def _fail(self, job_id: str, errors: List[str], error: Exception):
+        logger.exception("Analysis job %s failed", job_id)
+        errors.append(f"Analysis job failed: {str(error)}")
+        self._update(job_id, status=JOB_FAILED, finished_at=time.time(),
+                     errors=json.dumps(errors))
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running jobs to finish."""
+        self._executor.shutdown(wait=wait)
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, creating it on first use."""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue()
+    return _job_queue
@@ -0,0 +1,221 @@
+"""
+Lightweight instrumentation of the analysis hot paths.
+Records the duration and size of each stage (extraction, FastAgent calls,
+response parsing, summarization, rendering and blob I/O) per CV and per run,
+and exports them as Prometheus text metrics or a JSON trace.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from config import METRICS_ENABLED, METRICS_MAX_SPANS
+
+# Upper bounds (seconds) of the Prometheus latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Run the current stage belongs to; copied into worker threads by the pipeline
+_current_run: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "metrics_run_id", default=None)
+# CV (file name) the current stage works on, so its spans join up across stages
+_current_cv: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "metrics_cv", default=None)
+
+
+@dataclass
+class Span:
+    """One timed execution of a stage."""
+    __slots__ = ("stage", "start", "duration", "size", "error", "run_id", "cv", "thread")
+
+    stage: str
+    # Wall-clock start time (epoch seconds) and duration in seconds
+    start: float
+    duration: float
+    # Bytes or characters handled by the stage, 0 if not applicable
+    size: int
+    error: bool
+    run_id: Optional[str]
+    cv: Optional[str]
+    thread: int
+
+
+@dataclass
+class _StageTotals:
+    count: int = 0
+    seconds: float = 0.0
+    size: int = 0
+    errors: int = 0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+
+
+class SpanHandle:
+    """Lets the code inside a span set its size or mark it as failed."""
+    __slots__ = ("size", "error")
+
+    def __init__(self, size: int = 0):
+        self.size = size
+        self.error = False
+
+
+class MetricsRecorder:
+    """Thread-safe store of recent spans and cumulative per-stage totals."""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, max_spans: int = METRICS_MAX_SPANS):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._totals: Dict[str, _StageTotals] = defaultdict(_StageTotals)
+
+    def record(self, stage: str, start: float, duration: float, size: int = 0,
+               error: bool = False, cv: Optional[str] = None):
+        """Record one execution of a stage."""
+        if not self.enabled:
+            return
+
+        span = Span(stage, start, duration, size, error, _current_run.get(),
+                    cv if cv is not None else _current_cv.get(), threading.get_ident())
+        with self._lock:
+            self._spans.append(span)
+            totals = self._totals[stage]
+            totals.count += 1
+            totals.seconds += duration
+            totals.size += size
+            totals.errors += error
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    totals.buckets[i] += 1
+                    break
+
+    @contextmanager
+    def span(self, stage: str, size: int = 0, cv: Optional[str] = None) -> Iterator[SpanHandle]:
+        """Time the enclosed block as one execution of ``stage``; exceptions mark it failed."""
+        handle = SpanHandle(size)
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            yield handle
+        except GeneratorExit:
+            # A consumer that stops reading a streamed stage early is not a failure
+            raise
+        except BaseException:
+            handle.error = True
+            raise
+        finally:
+            self.record(stage, start, time.perf_counter() - started,
+                        handle.size, handle.error, cv)
+
+    def spans(self, run_id: Optional[str] = None) -> List[Span]:
+        """Return the recorded spans, optionally only those of one run."""
+        with self._lock:
+            spans = list(self._spans)
+        if run_id is not None:
+            spans = [span for span in spans if span.run_id == run_id]
+        return spans
+
+    def stage_breakdown(self, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Summarize the spans of a run (or all spans) per stage."""
+        by_stage: Dict[str, List[Span]] = defaultdict(list)
+        for span in self.spans(run_id):
+            by_stage[span.stage].append(span)
+
+        rows = []
+        for stage, spans in by_stage.items():
+            durations = sorted(span.duration for span in spans)
+            rows.append({
+                "stage": stage,
+                "count": len(spans),
+                "total_s": round(sum(durations), 3),
+                "mean_ms": round(sum(durations) / len(durations) * 1000, 1),
+                "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000, 1),
+                "size": sum(span.size for span in spans),
+                "errors": sum(span.error for span in spans)
+            })
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+    def prometheus_text(self) -> str:
+        """Cumulative per-stage metrics in the Prometheus text exposition format."""
+        with self._lock:
+            totals = {stage: (t.count, t.seconds, t.size, t.errors, list(t.buckets))
+                      for stage, t in self._totals.items()}
+
+        lines = [
+            "# HELP cv_analysis_stage_duration_seconds Time spent per execution of a stage.",
+            "# TYPE cv_analysis_stage_duration_seconds histogram"
+        ]
+        for stage, (count, seconds, _, _, buckets) in sorted(totals.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket_count
+                lines.append(
+                    f'cv_analysis_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(
+                f'cv_analysis_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(
+                f'cv_analysis_stage_duration_seconds_sum{{stage="{stage}"}} {seconds:.6f}')
+            lines.append(
+                f'cv_analysis_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+
+        lines += [
+            "# HELP cv_analysis_stage_size_total Bytes or characters processed per stage.",
+            "# TYPE cv_analysis_stage_size_total counter"
+        ]
+        lines += [f'cv_analysis_stage_size_total{{stage="{stage}"}} {size}'
+                  for stage, (_, _, size, _, _) in sorted(totals.items())]
+
+        lines += [
+            "# HELP cv_analysis_stage_errors_total Failed executions per stage.",
+            "# TYPE cv_analysis_stage_errors_total counter"
+        ]
+        lines += [f'cv_analysis_stage_errors_total{{stage="{stage}"}} {errors}'
+                  for stage, (_, _, _, errors, _) in sorted(totals.items())]
+        return "\n".join(lines) + "\n"
+
+    def trace_json(self, run_id: Optional[str] = None) -> str:
+        """Spans as a Chrome trace-event JSON document (viewable in Perfetto or chrome://tracing)."""
+        events = [{
+            "name": span.stage,
+            "cat": "cv_analysis",
+            "ph": "X",
+            "ts": int(span.start * 1_000_000),
+            "dur": int(span.duration * 1_000_000),
+            "pid": os.getpid(),
+            "tid": span.thread,
+            "args": {"run_id": span.run_id, "cv": span.cv, "size": span.size, "error": span.error}
+        } for span in self.spans(run_id)]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+    def clear(self):
+        """Drop all spans and totals."""
+        with self._lock:
+            self._spans.clear()
+            self._totals.clear()
+
+
+@contextmanager
+def run_context(run_id: str) -> Iterator[None]:
+    """Attribute the spans recorded inside the block, including in analyze_cvs workers, to a run."""
+    token = _current_run.set(run_id)
+    try:
+        yield
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def cv_context(cv_name: Optional[str]) -> Iterator[None]:
+    """Attribute the spans recorded inside the block to a CV, keyed by its file name."""
+    token = _current_cv.set(cv_name)
+    try:
+        yield
+    finally:
+        _current_cv.reset(token)
+
+
+# Shared by every instrumented stage in this process
+metrics = MetricsRecorder()
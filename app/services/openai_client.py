@@ -1,58 +1,82 @@
 """
 Azure OpenAI client for summarizing multiple CV analyses.
+Small candidate pools are compared in a single call; larger pools are summarized
+in parallel batches sized by a token budget and then reduced into one comparison.
+The final comparison can be streamed token by token for display as it arrives.
+In incremental mode each analysis is first condensed into a cached per-candidate
+digest, so only new or changed candidates cost a call before the final merge.
 """
 
-import streamlit as st
-import requests
+import hashlib
 import json
-from typing import List, Dict, Any
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator, Iterator, List, Dict, Any, Optional, Tuple
 
-from config import AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_KEY, AZURE_OPENAI_DEPLOYMENT_NAME
+from config import (
+    AZURE_OPENAI_ENDPOINT,
+    AZURE_OPENAI_KEY,
+    AZURE_OPENAI_DEPLOYMENT_NAME,
+    SUMMARY_PROMPT_TOKEN_BUDGET,
+    SUMMARY_MAX_TOKENS,
+    SUMMARY_BATCH_MAX_TOKENS,
+    SUMMARY_MAX_WORKERS,
+    SUMMARY_INCREMENTAL,
+    SUMMARY_DIGEST_MAX_TOKENS
+)
+from services.http_session import get_session
+from services.analysis_cache import AnalysisCache, make_cache_key
+from services.analysis_model import CandidateAnalysis
+from services.metrics import metrics
 
+logger = logging.getLogger(__name__)
 
-def summarize_cv_analyses(analyses: List[Dict[str, Any]]) -> str:
-    """Summarize multiple CV analyses using Azure OpenAI."""
-    url = f"{AZURE_OPENAI_ENDPOINT}/openai/deployments/{AZURE_OPENAI_DEPLOYMENT_NAME}/chat/completions?api-version=2023-12-01-preview"
+SYSTEM_PROMPT = "You are an AI assistant that helps compare and summarize multiple CV analyses for recruitment purposes. Provide detailed comparisons and clear recommendations."
 
-    # Prepare the prompt with all CV summaries
-    prompt = "Please provide a comprehensive comparison and summary of the following CV analyses:\n\n"
+COMPARISON_INSTRUCTIONS = "Please compare the candidates based on their qualifications, experience, skills, and overall suitability for the position. Highlight the strongest candidates and explain why. Create a table comparing key aspects across all candidates and provide a final ranking with rationale."
 
-    for analysis in analyses:
-        cv_name = analysis.get("CV Name", "Unnamed CV")
+BATCH_INSTRUCTIONS = "For each candidate above, write a concise profile covering qualifications, experience, key skills, notable strengths and weaknesses, and any scores given in the analysis. Keep the candidate names exactly as given. Finish with a short ranking of these candidates with one line of rationale each."
 
-        # Try to extract formatted analysis content if possible
-        try:
-            analysis_text = ""
-            analysis_data = json.loads(analysis.get("Analysis", "{}"))
+DIGEST_INSTRUCTIONS = "Condense the CV analysis above into a compact candidate profile of at most 150 words: qualifications, years and type of experience, key skills, main strengths, main gaps, and any scores given in the analysis. Do not mention the candidate's name."
+
+# Bump when the digest prompt changes so stale digests are not reused
+DIGEST_VERSION = "1"
+
+# Upper bound on reduce rounds when partial summaries still exceed the budget
+MAX_REDUCE_DEPTH = 3
+
+
+# Generator of (prompt, max_tokens) completion request batches that receives their
+# results and returns the final comparison prompt; see comparison_prompt_plan
+SummaryPlan = Generator[List[Tuple[str, int]], List[str], Any]
+
+
+class SummaryError(Exception):
+    """Raised when the Azure OpenAI API does not return usable content."""
 
-            for header in analysis_data:
-                chat_dict = header.get('__dict__', {})
-                chat_name = chat_dict.get('chat_name', '')
 
-                if chat_name in ["summary", "applicant_lookup_agent"]:
-                    chat_response = chat_dict.get('chat_response', {})
-                    chat_message = chat_response.get('chat_message', {})
-                    content = chat_message.get(
-                        '__dict__', {}).get('content', '')
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in text (about four characters per token)."""
+    return len(text) // 4 + 1
 
-                    if content:
-                        analysis_text += content + "\n"
 
-            # If we couldn't extract formatted content, use the raw analysis
-            if not analysis_text:
-                analysis_text = analysis.get(
-                    "Analysis", "No analysis available")
+def _format_candidates(entries: List[Tuple[str, str]]) -> str:
+    """Format (name, text) pairs as the candidate section of a prompt."""
+    return "".join(f"CV: {cv_name}\nAnalysis: {analysis_text}\n\n"
+                   for cv_name, analysis_text in entries)
 
-        except Exception:
-            # Fallback to raw analysis if JSON parsing fails
-            analysis_text = analysis.get("Analysis", "No analysis available")
 
-        prompt += f"CV: {cv_name}\n"
-        prompt += f"Analysis: {analysis_text}\n\n"
+def _build_comparison_prompt(entries: List[Tuple[str, str]]) -> str:
+    prompt = "Please provide a comprehensive comparison and summary of the following CV analyses:\n\n"
+    prompt += _format_candidates(entries)
+    prompt += COMPARISON_INSTRUCTIONS
+    return prompt
+
 
-    prompt += "Please compare the candidates based on their qualifications, experience, skills, and overall suitability for the position. Highlight the strongest candidates and explain why. Create a table comparing key aspects across all candidates and provide a final ranking with rationale."
+def build_completion_request(prompt: str, max_tokens: int, stream: bool = False) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    """Build the URL, headers and payload for a chat completion request."""
+    url = f"{AZURE_OPENAI_ENDPOINT}/openai/deployments/{AZURE_OPENAI_DEPLOYMENT_NAME}/chat/completions?api-version=2023-12-01-preview"
 
-    # Prepare the API request
     headers = {
         "Content-Type": "application/json",
         "api-key": AZURE_OPENAI_KEY
@@ -60,23 +84,253 @@ def summarize_cv_analyses(analyses: List[Dict[str, Any]]) -> str:
 
     payload = {
         "messages": [
-            {"role": "system", "content": "You are an AI assistant that helps compare and summarize multiple CV analyses for recruitment purposes. Provide detailed comparisons and clear recommendations."},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
         "temperature": 0.7,
-        "max_tokens": 2000
+        "max_tokens": max_tokens
     }
+    if stream:
+        payload["stream"] = True
 
-    try:
-        response = requests.post(url, headers=headers, json=payload)
+    return url, headers, payload
+
+
+def _chat_completion(prompt: str, max_tokens: int) -> str:
+    """Send a single chat completion request and return the message content."""
+    url, headers, payload = build_completion_request(prompt, max_tokens)
+
+    response = get_session(url).post(url, headers=headers, json=payload)
+    response.raise_for_status()
+    response_data = response.json()
+
+    # Extract the content from the response
+    if "choices" in response_data and len(response_data["choices"]) > 0:
+        return response_data["choices"][0]["message"]["content"]
+    raise SummaryError("The API did not return expected content.")
+
+
+def _stream_chat_completion(prompt: str, max_tokens: int) -> Iterator[str]:
+    """Send a streaming chat completion request and yield content deltas as they arrive."""
+    url, headers, payload = build_completion_request(
+        prompt, max_tokens, stream=True)
+
+    with get_session(url).post(url, headers=headers, json=payload, stream=True) as response:
         response.raise_for_status()
-        response_data = response.json()
 
-        # Extract the summary from the response
-        if "choices" in response_data and len(response_data["choices"]) > 0:
-            return response_data["choices"][0]["message"]["content"]
-        else:
+        received_content = False
+        # Server-sent events: one "data: {...}" line per chunk, terminated by "data: [DONE]"
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            chunk = json.loads(data)
+            # Azure sends content filter results in chunks without choices
+            for choice in chunk.get("choices", []):
+                content = choice.get("delta", {}).get("content")
+                if content:
+                    received_content = True
+                    yield content
+
+        if not received_content:
+            raise SummaryError("The API did not return expected content.")
+
+
+def _batch_by_budget(entries: List[Tuple[str, str]], token_budget: int) -> List[List[Tuple[str, str]]]:
+    """Group (name, text) pairs into batches whose prompts fit within the token budget.
+
+    A single entry larger than the budget is truncated so that it fits on its own.
+    """
+    batches: List[List[Tuple[str, str]]] = []
+    current: List[Tuple[str, str]] = []
+    current_tokens = 0
+
+    for cv_name, text in entries:
+        tokens = estimate_tokens(_format_candidates([(cv_name, text)]))
+        if tokens > token_budget:
+            text = text[:max(0, token_budget * 4 - len(cv_name) - 32)]
+            tokens = token_budget
+
+        if current and current_tokens + tokens > token_budget:
+            batches.append(current)
+            current, current_tokens = [], 0
+
+        current.append((cv_name, text))
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _batch_prompt(batch: List[Tuple[str, str]]) -> str:
+    prompt = "Please summarize the following CV analyses:\n\n"
+    prompt += _format_candidates(batch)
+    prompt += BATCH_INSTRUCTIONS
+    return prompt
+
+
+def _reduce_token_budget() -> int:
+    # Leave room for the instructions around the candidate section
+    return SUMMARY_PROMPT_TOKEN_BUDGET - estimate_tokens(COMPARISON_INSTRUCTIONS) - 100
+
+
+def _reduce_prompt(entries: List[Tuple[str, str]], token_budget: int) -> str:
+    """Reduce step: build the final comparison prompt over partial summaries."""
+    # Guarantee the final prompt fits, even if the reduce rounds ran out
+    total_tokens = estimate_tokens(_format_candidates(entries))
+    if total_tokens > token_budget:
+        max_chars = token_budget * 4 // len(entries)
+        entries = [(name, text[:max_chars]) for name, text in entries]
+
+    prompt = "Please provide a comprehensive comparison and summary of the following candidate groups. Each group contains condensed profiles of several CV analyses:\n\n"
+    prompt += _format_candidates(entries)
+    prompt += COMPARISON_INSTRUCTIONS + \
+        " Include every candidate from all groups in the table and the final ranking."
+    return prompt
+
+
+def _map_reduce_prompt(entries: List[Tuple[str, str]]) -> SummaryPlan:
+    """Summarize candidates in batches and build the prompt that reduces them."""
+    token_budget = _reduce_token_budget()
+
+    for _ in range(MAX_REDUCE_DEPTH):
+        batches = _batch_by_budget(entries, token_budget)
+        if len(batches) <= 1:
+            break
+
+        partials = yield [(_batch_prompt(batch), SUMMARY_BATCH_MAX_TOKENS) for batch in batches]
+
+        # Each partial summary becomes one entry of the next round
+        entries = [(f"Candidate group {i+1}", partial)
+                   for i, partial in enumerate(partials)]
+
+    return _reduce_prompt(entries, token_budget)
+
+
+_digest_cache = None
+
+
+def _get_digest_cache() -> AnalysisCache:
+    """Return the on-disk cache of per-candidate digests, creating it on first use."""
+    global _digest_cache
+    if _digest_cache is None:
+        _digest_cache = AnalysisCache(namespace="candidate_digests")
+    return _digest_cache
+
+
+def _digest_key(analysis_text: str) -> str:
+    analysis_hash = hashlib.sha256(analysis_text.encode("utf-8")).hexdigest()
+    return make_cache_key("digest", DIGEST_VERSION, AZURE_OPENAI_DEPLOYMENT_NAME, analysis_hash)
+
+
+def _digest_prompt(analysis_text: str) -> str:
+    return f"CV analysis:\n{analysis_text}\n\n{DIGEST_INSTRUCTIONS}"
+
+
+def _candidate_digests(entries: List[Tuple[str, str]]) -> SummaryPlan:
+    """Replace each analysis with its digest, only calling the API for unseen analyses."""
+    cache = _get_digest_cache()
+    keys = [_digest_key(text) for _, text in entries]
+    digests = [cache.get(key) for key in keys]
+
+    missing = [i for i, digest in enumerate(digests) if digest is None]
+    if missing:
+        new_digests = yield [(_digest_prompt(entries[i][1]), SUMMARY_DIGEST_MAX_TOKENS)
+                             for i in missing]
+        for i, digest in zip(missing, new_digests):
+            cache.set(keys[i], digest)
+            digests[i] = digest
+
+    return [(cv_name, digest) for (cv_name, _), digest in zip(entries, digests)]
+
+
+def _candidate_entries(analyses: List[CandidateAnalysis]) -> List[Tuple[str, str]]:
+    return [(analysis.cv_name or "Unnamed CV", analysis.comparison_text)
+            for analysis in analyses]
+
+
+def comparison_prompt_plan(analyses: List[CandidateAnalysis]) -> SummaryPlan:
+    """Digest and map-reduce stages of a summary, independent of how requests are sent.
+
+    Yields each stage's chat completion requests as (prompt, max_tokens) pairs and
+    expects their results sent back in the same order; returns the prompt for the
+    final comparison. Drive it with advance_plan.
+    """
+    entries = _candidate_entries(analyses)
+
+    # Work from cached per-candidate digests so unchanged candidates cost nothing
+    if SUMMARY_INCREMENTAL:
+        entries = yield from _candidate_digests(entries)
+
+    # Compare everything in one call when it fits; otherwise map-reduce
+    prompt = _build_comparison_prompt(entries)
+    if estimate_tokens(prompt) <= SUMMARY_PROMPT_TOKEN_BUDGET:
+        return prompt
+    return (yield from _map_reduce_prompt(entries))
+
+
+def advance_plan(plan: SummaryPlan, results: Optional[List[str]] = None) -> Tuple[Optional[List[Tuple[str, int]]], str]:
+    """Send a stage's results to a summary plan (None to start it).
+
+    Returns the next stage's requests, or None and the final comparison prompt
+    once the plan is done. Advancing a plan reads and writes the digest cache.
+    """
+    try:
+        return plan.send(results), ""
+    except StopIteration as done:
+        return None, done.value
+
+
+def _final_comparison_prompt(analyses: List[CandidateAnalysis]) -> str:
+    """Run the digest and map-reduce stages and return the prompt for the final comparison."""
+    plan = comparison_prompt_plan(analyses)
+    requests, prompt = advance_plan(plan)
+    while requests is not None:
+        with ThreadPoolExecutor(max_workers=max(1, SUMMARY_MAX_WORKERS)) as executor:
+            results = list(executor.map(lambda request: _chat_completion(*request), requests))
+        requests, prompt = advance_plan(plan, results)
+    return prompt
+
+
+def summarize_cv_analyses(analyses: List[CandidateAnalysis]) -> str:
+    """Summarize multiple CV analyses using Azure OpenAI."""
+    with metrics.span("summarize") as span:
+        try:
+            prompt = _final_comparison_prompt(analyses)
+            span.size = len(prompt)
+            return _chat_completion(prompt, SUMMARY_MAX_TOKENS)
+        except SummaryError:
+            span.error = True
             return "Failed to generate summary. The API did not return expected content."
-    except Exception as e:
-        st.error(f"Azure OpenAI API Error: {str(e)}")
-        return f"Error generating summary: {str(e)}"
+        except Exception as e:
+            logger.error("Azure OpenAI API Error: %s", e)
+            span.error = True
+            return f"Error generating summary: {str(e)}"
+
+
+def stream_cv_summary(analyses: List[CandidateAnalysis]) -> Iterator[str]:
+    """Summarize multiple CV analyses, yielding the final comparison as it is generated.
+
+    Digest and map-reduce stages run to completion first; only the final comparison
+    is streamed. On failure the error is yielded as text, as summarize_cv_analyses
+    returns it, and then re-raised so callers do not store it as the summary.
+    """
+    with metrics.span("summarize") as span:
+        try:
+            prompt = _final_comparison_prompt(analyses)
+            span.size = len(prompt)
+            yield from _stream_chat_completion(prompt, SUMMARY_MAX_TOKENS)
+        except SummaryError:
+            span.error = True
+            yield "Failed to generate summary. The API did not return expected content."
+            raise
+        except Exception as e:
+            logger.error("Azure OpenAI API Error: %s", e)
+            span.error = True
+            yield f"\n\nError generating summary: {str(e)}"
+            raise
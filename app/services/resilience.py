@@ -0,0 +1,279 @@
+"""
+Client-side resilience for calls to the FastAgent API.
+Combines an adaptive token-bucket rate limiter, jittered exponential retries
+and a circuit breaker that fails fast while the backend is down.
+"""
+
+import asyncio
+import email.utils
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential
+)
+
+from config import (
+    API_RATE_LIMIT,
+    API_RATE_LIMIT_MIN,
+    API_RATE_LIMIT_MAX,
+    API_MAX_RETRIES,
+    API_RETRY_MAX_WAIT,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RetryableAPIError(Exception):
+    """A transient failure (429, 5xx or connection error) that is worth retrying."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the backend while the circuit breaker is open."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def check_response(response: Any):
+    """Raise RetryableAPIError for 429/5xx responses, or the client's own error for other failures.
+
+    Works with both requests and httpx responses.
+    """
+    status_code = response.status_code
+    if status_code == 429 or status_code >= 500:
+        raise RetryableAPIError(
+            f"HTTP {status_code} from {response.url}",
+            status_code=status_code,
+            retry_after=parse_retry_after(response.headers.get("Retry-After"))
+        )
+    response.raise_for_status()
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate adapts to the backend.
+
+    The rate grows additively on success and halves when the backend throttles
+    (HTTP 429), and a Retry-After hint pauses all callers until it has passed.
+    """
+
+    def __init__(self, rate: float = API_RATE_LIMIT, min_rate: float = API_RATE_LIMIT_MIN,
+                 max_rate: float = API_RATE_LIMIT_MAX, burst: Optional[float] = None,
+                 increase_step: float = 0.5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens +
+                               (now - self._updated) * self.rate)
+            self._updated = now
+
+            # A negative balance is a debt that later callers wait out in turn
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        """Probe for more throughput after a successful call."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """Back off after the backend signalled that it is overloaded."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                self._blocked_until = max(
+                    self._blocked_until, time.monotonic() + retry_after)
+        logger.warning("FastAgent API throttled; rate reduced to %.2f req/s%s", self.rate,
+                       f", pausing {retry_after:.1f}s" if retry_after else "")
+
+
+class CircuitBreaker:
+    """Stops calling a failing backend until a cool-down period has passed.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls
+    fail immediately. Once ``reset_timeout`` has elapsed a single trial call is let
+    through; its outcome closes the circuit again or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call should not reach the backend."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+
+            raise CircuitOpenError(
+                "FastAgent API is unavailable; skipping call until it recovers")
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error(
+                        "FastAgent API circuit opened after %d failures", self._failures)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+def _wait_for_retry(retry_state) -> float:
+    """Jittered exponential backoff that honours the server's Retry-After hint."""
+    wait = wait_random_exponential(
+        multiplier=0.5, max=API_RETRY_MAX_WAIT)(retry_state)
+    exception = retry_state.outcome.exception()
+    retry_after = getattr(exception, "retry_after", None)
+    if retry_after:
+        wait = max(wait, min(retry_after, API_RETRY_MAX_WAIT))
+    return wait
+
+
+class ResiliencePolicy:
+    """Rate limiting, retries and circuit breaking around calls to one backend."""
+
+    def __init__(self, limiter: AdaptiveRateLimiter, breaker: CircuitBreaker,
+                 max_retries: int = API_MAX_RETRIES):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+
+    def _retry_kwargs(self):
+        return dict(
+            stop=stop_after_attempt(self.max_retries + 1),
+            wait=_wait_for_retry,
+            retry=retry_if_exception_type(RetryableAPIError),
+            reraise=True
+        )
+
+    def _record(self, error: Optional[RetryableAPIError]):
+        if error is None:
+            self.limiter.on_success()
+            self.breaker.record_success()
+        elif error.status_code == 429:
+            # Throttling means the backend is up but busy: slow down, don't trip the breaker
+            self.limiter.on_throttle(error.retry_after)
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def call(self, send: Callable[[], T]) -> T:
+        """Call ``send`` with rate limiting and retries.
+
+        ``send`` must raise RetryableAPIError for transient failures, for example
+        via check_response. CircuitOpenError is raised without retrying.
+        """
+        for attempt in Retrying(**self._retry_kwargs()):
+            with attempt:
+                self.breaker.before_call()
+                self.limiter.acquire()
+                try:
+                    result = send()
+                except RetryableAPIError as e:
+                    self._record(e)
+                    raise
+                except Exception:
+                    # Any other error still means the backend answered
+                    self.breaker.record_success()
+                    raise
+                self._record(None)
+                return result
+
+    async def call_async(self, send: Callable[[], Awaitable[T]]) -> T:
+        """Async variant of call for coroutine functions."""
+        async for attempt in AsyncRetrying(**self._retry_kwargs()):
+            with attempt:
+                self.breaker.before_call()
+                await self.limiter.acquire_async()
+                try:
+                    result = await send()
+                except RetryableAPIError as e:
+                    self._record(e)
+                    raise
+                except Exception:
+                    # Any other error still means the backend answered
+                    self.breaker.record_success()
+                    raise
+                self._record(None)
+                return result
+
+
+# Shared by every caller of the FastAgent API in this process
+fastagent_policy = ResiliencePolicy(AdaptiveRateLimiter(), CircuitBreaker())
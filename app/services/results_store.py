@@ -0,0 +1,300 @@
+"""
+Persistent local store for analysis runs and their results.
+Results are kept in SQLite, indexed by CV hash, candidate name, thread ID and
+run time, so past runs can be reloaded and paged without calling the API again.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import RESULTS_DB_PATH
+from services.analysis_model import CandidateAnalysis
+
+ITEM_PENDING = "pending"
+ITEM_COMPLETED = "completed"
+ITEM_FAILED = "failed"
+# Left out of the analysis by pre-screening; not resumed
+ITEM_SKIPPED = "skipped"
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY,
+        created_at REAL NOT NULL,
+        label TEXT NOT NULL DEFAULT '',
+        total INTEGER NOT NULL DEFAULT 0,
+        summary TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        cv_name TEXT NOT NULL,
+        cv_hash TEXT NOT NULL DEFAULT '',
+        thread_id TEXT NOT NULL DEFAULT '',
+        message_id TEXT NOT NULL DEFAULT '',
+        overall_score REAL,
+        cached INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        record TEXT NOT NULL,
+        UNIQUE (run_id, position)
+    )""",
+    # Checkpoint journal: one row per CV of a run, so unfinished items can be resumed
+    """CREATE TABLE IF NOT EXISTS run_items (
+        run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        cv_name TEXT NOT NULL,
+        cv_hash TEXT NOT NULL DEFAULT '',
+        cv_text TEXT NOT NULL,
+        status TEXT NOT NULL,
+        thread_id TEXT NOT NULL DEFAULT '',
+        message_id TEXT NOT NULL DEFAULT '',
+        error TEXT NOT NULL DEFAULT '',
+        updated_at REAL NOT NULL,
+        source_files TEXT NOT NULL DEFAULT '[]',
+        PRIMARY KEY (run_id, position)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_run_items_status ON run_items (run_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_results_cv_hash ON results (cv_hash)",
+    "CREATE INDEX IF NOT EXISTS idx_results_cv_name ON results (cv_name)",
+    "CREATE INDEX IF NOT EXISTS idx_results_thread_id ON results (thread_id)",
+    "CREATE INDEX IF NOT EXISTS idx_results_created_at ON results (created_at)"
+]
+
+# (table, column, definition) added after the table was first released
+_ADDED_COLUMNS = [
+    ("run_items", "source_files", "TEXT NOT NULL DEFAULT '[]'")
+]
+
+
+class ResultsStore:
+    """SQLite-backed store of analysis runs and their per-CV results."""
+
+    def __init__(self, path: str = RESULTS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            for table, column, definition in _ADDED_COLUMNS:
+                columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation keeps the store safe to use from worker threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create_run(self, total: int, label: str = "") -> str:
+        """Register a new run and return its ID."""
+        run_id = str(uuid.uuid4())
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO runs (run_id, created_at, label, total) VALUES (?, ?, ?, ?)",
+                (run_id, time.time(), label, total)
+            )
+        return run_id
+
+    def add_result(self, run_id: str, position: int, record: CandidateAnalysis, cv_hash: str = ""):
+        """Store the result for the CV at the given upload position of a run.
+
+        The matching journal item, if any, is checkpointed as completed in the same transaction.
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (run_id, position, cv_name, cv_hash, thread_id, "
+                "message_id, overall_score, cached, created_at, record) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, position, record.cv_name, cv_hash, record.thread_id, record.message_id,
+                 record.overall_score, int(record.cached), now, json.dumps(record.to_dict()))
+            )
+            conn.execute(
+                "UPDATE run_items SET status = ?, thread_id = ?, message_id = ?, error = '', "
+                "updated_at = ? WHERE run_id = ? AND position = ?",
+                (ITEM_COMPLETED, record.thread_id, record.message_id, now, run_id, position)
+            )
+
+    def journal_items(self, run_id: str, items: List[Tuple[int, str, str, str, List[str]]]):
+        """Record the (position, cv_name, cv_hash, cv_text, source_files) items of a run as pending."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO run_items (run_id, position, cv_name, cv_hash, cv_text, "
+                "status, updated_at, source_files) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, position, cv_name, cv_hash, cv_text, ITEM_PENDING, now, json.dumps(source_files))
+                 for position, cv_name, cv_hash, cv_text, source_files in items]
+            )
+
+    def set_run_total(self, run_id: str, total: int):
+        """Update the number of CVs a run is expected to produce results for."""
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE runs SET total = ? WHERE run_id = ?", (total, run_id))
+
+    def mark_item_failed(self, run_id: str, position: int, error: str):
+        """Checkpoint a journal item whose analysis failed."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE run_items SET status = ?, error = ?, updated_at = ? "
+                "WHERE run_id = ? AND position = ?",
+                (ITEM_FAILED, error, time.time(), run_id, position)
+            )
+
+    def mark_items_skipped(self, run_id: str, items: List[Tuple[int, str]]):
+        """Checkpoint the (position, reason) journal items left out by pre-screening."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "UPDATE run_items SET status = ?, error = ?, updated_at = ? "
+                "WHERE run_id = ? AND position = ?",
+                [(ITEM_SKIPPED, reason, now, run_id, position) for position, reason in items]
+            )
+
+    def get_unfinished_items(self, run_id: str) -> List[Dict[str, Any]]:
+        """Return the journal items of a run that are pending or failed, in upload order."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT position, cv_name, cv_hash, cv_text, status, error, source_files FROM run_items "
+                "WHERE run_id = ? AND status NOT IN (?, ?) ORDER BY position",
+                (run_id, ITEM_COMPLETED, ITEM_SKIPPED)
+            ).fetchall()
+        return [{"position": position, "cv_name": cv_name, "cv_hash": cv_hash,
+                 "cv_text": cv_text, "status": status, "error": error,
+                 "source_files": json.loads(source_files)}
+                for position, cv_name, cv_hash, cv_text, status, error, source_files in rows]
+
+    def count_unfinished_items(self, run_id: str) -> int:
+        """Return the number of journal items of a run that still need to be analyzed."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM run_items WHERE run_id = ? AND status NOT IN (?, ?)",
+                (run_id, ITEM_COMPLETED, ITEM_SKIPPED)).fetchone()
+        return row[0]
+
+    def count_results(self, run_id: str) -> int:
+        """Return the number of stored results of a run."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM results WHERE run_id = ?", (run_id,)).fetchone()
+        return row[0]
+
+    def get_results(self, run_id: str, offset: int = 0, limit: Optional[int] = None) -> List[CandidateAnalysis]:
+        """Return the results of a run in upload order, optionally one page at a time."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT record FROM results WHERE run_id = ? ORDER BY position LIMIT ? OFFSET ?",
+                (run_id, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [CandidateAnalysis.from_dict(json.loads(row[0])) for row in rows]
+
+    def get_result_index(self, run_id: str) -> List[Dict[str, Any]]:
+        """Return one compact row per CV of a run, in upload order, without loading the analyses.
+
+        Rows have position, cv_name, overall_score, cached, status, error and
+        version (when the result was stored, so renders of it can be cached).
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT position, cv_name, overall_score, cached, ?, '', created_at "
+                "FROM results WHERE run_id = ? "
+                "UNION ALL "
+                "SELECT position, cv_name, NULL, 0, status, error, updated_at "
+                "FROM run_items i WHERE run_id = ? AND NOT EXISTS ("
+                "SELECT 1 FROM results r WHERE r.run_id = i.run_id AND r.position = i.position) "
+                "ORDER BY position",
+                (ITEM_COMPLETED, run_id, run_id)
+            ).fetchall()
+        return [{"position": position, "cv_name": cv_name, "overall_score": overall_score,
+                 "cached": bool(cached), "status": status, "error": error, "version": version}
+                for position, cv_name, overall_score, cached, status, error, version in rows]
+
+    def get_result(self, run_id: str, position: int) -> Optional[CandidateAnalysis]:
+        """Return the result for the CV at the given upload position of a run, if any."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT record FROM results WHERE run_id = ? AND position = ?",
+                (run_id, position)).fetchone()
+        return CandidateAnalysis.from_dict(json.loads(row[0])) if row else None
+
+    def list_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return the most recent runs with their result counts."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT r.run_id, r.created_at, r.label, r.total, "
+                "(SELECT COUNT(*) FROM results WHERE run_id = r.run_id) "
+                "FROM runs r ORDER BY r.created_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [{"run_id": run_id, "created_at": created_at, "label": label,
+                 "total": total, "completed": completed}
+                for run_id, created_at, label, total, completed in rows]
+
+    def find_by_cv_hash(self, cv_hash: str) -> List[CandidateAnalysis]:
+        """Return all stored results for the CV with the given text hash, newest first."""
+        return self._find("cv_hash", cv_hash)
+
+    def find_by_cv_name(self, cv_name: str) -> List[CandidateAnalysis]:
+        """Return all stored results for the given candidate file name, newest first."""
+        return self._find("cv_name", cv_name)
+
+    def find_by_thread_id(self, thread_id: str) -> List[CandidateAnalysis]:
+        """Return the stored results for the given FastAgent thread ID."""
+        return self._find("thread_id", thread_id)
+
+    def _find(self, column: str, value: str) -> List[CandidateAnalysis]:
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT record FROM results WHERE {column} = ? ORDER BY created_at DESC",
+                (value,)
+            ).fetchall()
+        return [CandidateAnalysis.from_dict(json.loads(row[0])) for row in rows]
+
+    def save_summary(self, run_id: str, summary: Optional[str]):
+        """Store the comparative summary generated for a run."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET summary = ? WHERE run_id = ?", (summary, run_id))
+
+    def get_summary(self, run_id: str) -> Optional[str]:
+        """Return the stored comparative summary of a run, if any."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT summary FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return row[0] if row else None
+
+    def delete_run(self, run_id: str):
+        """Delete a run and all of its results."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+
+_results_store: Optional[ResultsStore] = None
+_results_store_lock = threading.Lock()
+
+
+def get_results_store() -> ResultsStore:
+    """Return the process-wide results store, creating it on first use."""
+    global _results_store
+    if _results_store is None:
+        with _results_store_lock:
+            if _results_store is None:
+                _results_store = ResultsStore()
+    return _results_store
@@ -1,40 +1,416 @@
 """
 Functions for extracting text from various document types.
+Extraction results are cached by file content hash, and large documents or
+batches of files are parsed in parallel on a process pool. Uploads above the
+streaming threshold are read in place, page by page, with bounded memory.
+pypdf and docx2txt are only imported once a document of that type is parsed.
 """
 
+import atexit
+import hashlib
+import io
+import multiprocessing
 import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from io import BytesIO
-import docx2txt
-import pypdf
+from typing import Iterator, List, Optional, Tuple
 
+from cachetools import LRUCache
 
-def extract_text_from_file(uploaded_file) -> str:
-    """Extract text content from various file types."""
+from config import (
+    EXTRACTION_WORKERS,
+    EXTRACTION_CACHE_SIZE,
+    PDF_PARALLEL_PAGE_THRESHOLD,
+    STREAMING_EXTRACTION_THRESHOLD_BYTES,
+    EXTRACTION_MAX_PAGES,
+    EXTRACTION_MAX_CHARS,
+    EXTRACTION_SPOOL_MAX_MEMORY_BYTES
+)
+from services.metrics import metrics
+
+# Separates the pages of extracted PDF text
+PAGE_BREAK = "\f"
+
+# Size of the chunks used when hashing, spooling or reading text streams
+_CHUNK_SIZE = 1024 * 1024
+
+# Extracted text keyed by (sha256 of file bytes, extension)
+_text_cache: LRUCache = LRUCache(maxsize=EXTRACTION_CACHE_SIZE)
+_text_cache_lock = threading.Lock()
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Forking the multithreaded Streamlit server can copy held locks into the workers,
+# so they are started from a clean forkserver (spawn where that is unavailable)
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class LocalFile(BytesIO):
+    """In-memory file read from disk, mirroring the interface of Streamlit's UploadedFile."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        super().__init__(data)
+        self.name = os.path.basename(path)
+        self.path = path
+        self.size = len(data)
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    """Return the shared extraction process pool, or None if parallelism is disabled."""
+    global _executor
+    if EXTRACTION_WORKERS <= 1:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context(_START_METHOD))
+            atexit.register(_executor.shutdown, wait=False)
+        return _executor
+
+
+def _reset_executor():
+    """Drop a broken process pool so the next call creates a fresh one."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def _file_extension(uploaded_file) -> str:
+    return os.path.splitext(uploaded_file.name)[1].lower()
+
+
+def _file_size(uploaded_file) -> int:
+    """Return the size of an uploaded file without copying its content."""
+    size = getattr(uploaded_file, "size", None)
+    if size is not None:
+        return size
+
+    position = uploaded_file.tell()
+    size = uploaded_file.seek(0, io.SEEK_END)
+    uploaded_file.seek(position)
+    return size
+
+
+def _content_digest(uploaded_file) -> str:
+    """Hash the file content, reading from the upload buffer instead of copying it."""
+    getbuffer = getattr(uploaded_file, "getbuffer", None)
+    if getbuffer is not None:
+        with getbuffer() as view:
+            return hashlib.sha256(view).hexdigest()
+
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def clear_extraction_cache():
+    """Drop all cached extracted texts."""
+    with _text_cache_lock:
+        _text_cache.clear()
+
+
+def _get_cached_text(key: Tuple[str, str]) -> Optional[str]:
+    with _text_cache_lock:
+        return _text_cache.get(key)
+
+
+def _set_cached_text(key: Tuple[str, str], text: str):
+    with _text_cache_lock:
+        _text_cache[key] = text
+
+
+def _cap_text(text: str, max_chars: int = EXTRACTION_MAX_CHARS) -> str:
+    """Truncate text to the configured character cap (0 disables the cap)."""
+    if max_chars > 0 and len(text) > max_chars:
+        return text[:max_chars]
+    return text
+
+
+def _page_limit(page_count: int, max_pages: int = EXTRACTION_MAX_PAGES) -> int:
+    """Number of pages to extract given the configured page cap (0 disables the cap)."""
+    return min(page_count, max_pages) if max_pages > 0 else page_count
+
+
+@contextmanager
+def _open_stream(uploaded_file) -> Iterator[io.IOBase]:
+    """Yield a seekable binary stream over the upload without duplicating it in memory.
+
+    Seekable uploads are read in place; anything else is spooled to a temporary
+    file that only stays in memory up to the configured spool size.
+    """
+    seekable = getattr(uploaded_file, "seekable", None)
+    if seekable is not None and seekable():
+        uploaded_file.seek(0)
+        try:
+            yield uploaded_file
+        finally:
+            uploaded_file.seek(0)
+        return
+
+    with tempfile.SpooledTemporaryFile(max_size=EXTRACTION_SPOOL_MAX_MEMORY_BYTES) as spool:
+        shutil.copyfileobj(uploaded_file, spool, _CHUNK_SIZE)
+        spool.seek(0)
+        yield spool
+
+
+def iter_text_pages(uploaded_file, max_pages: int = EXTRACTION_MAX_PAGES,
+                    max_chars: int = EXTRACTION_MAX_CHARS) -> Iterator[str]:
+    """Yield the text of an uploaded file page by page, stopping at the page and character caps.
+
+    PDFs are parsed lazily from the upload stream, and every page after the first
+    starts with PAGE_BREAK. DOCX and plain text files have no pages, so their text is
+    yielded in chunks instead. A cap of 0 disables it.
+    """
+    file_extension = _file_extension(uploaded_file)
+    remaining_chars = max_chars if max_chars > 0 else None
+
+    def capped(text: str) -> str:
+        nonlocal remaining_chars
+        if remaining_chars is None:
+            return text
+        text = text[:remaining_chars]
+        remaining_chars -= len(text)
+        return text
+
+    with _open_stream(uploaded_file) as stream:
+        if file_extension == ".pdf":
+            import pypdf
+
+            pdf_reader = pypdf.PdfReader(stream)
+            for page_num in range(_page_limit(len(pdf_reader.pages), max_pages)):
+                page_text = pdf_reader.pages[page_num].extract_text()
+                yield capped(PAGE_BREAK + page_text if page_num else page_text)
+                if remaining_chars == 0:
+                    return
+
+        elif file_extension == ".docx":
+            # The DOCX body is a single XML part, so it is parsed in one go and chunked
+            import docx2txt
+
+            text = capped(docx2txt.process(stream))
+            for start in range(0, len(text), _CHUNK_SIZE):
+                yield text[start:start + _CHUNK_SIZE]
+
+        elif file_extension in [".txt", ".md", ".json"]:
+            text_stream = io.TextIOWrapper(stream, encoding="utf-8")
+            try:
+                for chunk in iter(lambda: text_stream.read(_CHUNK_SIZE), ""):
+                    yield capped(chunk)
+                    if remaining_chars == 0:
+                        return
+            finally:
+                # Leave the underlying upload open for the caller
+                text_stream.detach()
+
+        else:
+            yield f"Unsupported file type: {file_extension}"
+
+
+def _extract_text_streaming(uploaded_file) -> str:
+    """Extract text from a large upload page by page without copying the file."""
     try:
-        file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+        return "".join(iter_text_pages(uploaded_file))
+    except Exception as e:
+        return f"Error extracting text: {str(e)}"
+
+
+def _extract_pdf_pages(data: bytes, start: int, stop: int) -> str:
+    """Extract the text of pages [start, stop) from PDF bytes."""
+    import pypdf
+
+    pdf_reader = pypdf.PdfReader(BytesIO(data))
+    return PAGE_BREAK.join(pdf_reader.pages[page_num].extract_text()
+                           for page_num in range(start, stop))
+
+
+def _extract_pdf_bytes(data: bytes, parallel: bool) -> str:
+    """Extract text from PDF bytes, splitting large documents across the process pool."""
+    import pypdf
+
+    pdf_reader = pypdf.PdfReader(BytesIO(data))
+    page_count = _page_limit(len(pdf_reader.pages))
+
+    executor = _get_executor() if parallel else None
+    if executor is None or page_count < PDF_PARALLEL_PAGE_THRESHOLD:
+        # Build the text with a single join instead of repeated concatenation
+        return PAGE_BREAK.join(pdf_reader.pages[page_num].extract_text()
+                               for page_num in range(page_count))
 
+    # Split the document into one contiguous page range per worker
+    chunk_size = -(-page_count // EXTRACTION_WORKERS)
+    ranges = [(start, min(start + chunk_size, page_count))
+              for start in range(0, page_count, chunk_size)]
+
+    try:
+        futures = [executor.submit(_extract_pdf_pages, data, start, stop)
+                   for start, stop in ranges]
+        return PAGE_BREAK.join(future.result() for future in futures)
+    except Exception:
+        # Fall back to in-process extraction if the pool is unavailable
+        _reset_executor()
+        return _extract_pdf_pages(data, 0, page_count)
+
+
+def _extract_text_from_bytes(data: bytes, file_extension: str, parallel: bool = False) -> str:
+    """Extract text from raw file bytes based on the file extension."""
+    try:
         if file_extension == ".pdf":
-            return extract_text_from_pdf(uploaded_file)
+            return _cap_text(_extract_pdf_bytes(data, parallel))
         elif file_extension == ".docx":
-            return extract_text_from_docx(uploaded_file)
+            import docx2txt
+
+            return _cap_text(docx2txt.process(BytesIO(data)))
         elif file_extension in [".txt", ".md", ".json"]:
-            return uploaded_file.getvalue().decode("utf-8")
+            return _cap_text(data.decode("utf-8"))
         else:
             return f"Unsupported file type: {file_extension}"
     except Exception as e:
         return f"Error extracting text: {str(e)}"
 
 
+def _timed_extract(data: bytes, file_extension: str) -> Tuple[str, float, float]:
+    """Extract text in a pool worker, returning it with the start time and duration."""
+    start = time.time()
+    started = time.perf_counter()
+    text = _extract_text_from_bytes(data, file_extension)
+    return text, start, time.perf_counter() - started
+
+
+def is_extraction_failure(text: str) -> bool:
+    """Whether text is an extraction error message rather than document content."""
+    return text.startswith("Error extracting text:") or text.startswith("Unsupported file type:")
+
+
+def _use_streaming(uploaded_file) -> bool:
+    return _file_size(uploaded_file) > STREAMING_EXTRACTION_THRESHOLD_BYTES
+
+
+def extract_text_from_file(uploaded_file) -> str:
+    """Extract text content from various file types."""
+    with metrics.span("extract", cv=getattr(uploaded_file, "name", None)) as span:
+        try:
+            file_extension = _file_extension(uploaded_file)
+            key = (_content_digest(uploaded_file), file_extension)
+            span.size = _file_size(uploaded_file)
+        except Exception as e:
+            span.error = True
+            return f"Error extracting text: {str(e)}"
+
+        # Reruns with the same document are answered from the cache
+        text = _get_cached_text(key)
+        if text is not None:
+            return text
+
+        if _use_streaming(uploaded_file):
+            text = _extract_text_streaming(uploaded_file)
+        else:
+            text = _extract_text_from_bytes(
+                uploaded_file.getvalue(), file_extension, parallel=True)
+
+        if is_extraction_failure(text):
+            span.error = True
+        else:
+            _set_cached_text(key, text)
+        return text
+
+
+def extract_texts_from_files(uploaded_files) -> List[str]:
+    """Extract text from several files in parallel, returning texts in input order."""
+    with metrics.span("extract_batch") as span:
+        texts = _extract_texts(uploaded_files)
+        span.size = sum(len(text) for text in texts)
+        return texts
+
+
+def _extract_texts(uploaded_files) -> List[str]:
+    # Every file gets its own "extract" span, keyed by file name like the later stages
+    texts: List[Optional[str]] = [None] * len(uploaded_files)
+    extracted = []
+    pending = []
+
+    for i, uploaded_file in enumerate(uploaded_files):
+        name = getattr(uploaded_file, "name", None)
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            file_extension = _file_extension(uploaded_file)
+            key = (_content_digest(uploaded_file), file_extension)
+        except Exception as e:
+            texts[i] = f"Error extracting text: {str(e)}"
+            metrics.record("extract", start, time.perf_counter() - started, error=True, cv=name)
+            continue
+
+        cached_text = _get_cached_text(key)
+        if cached_text is not None:
+            texts[i] = cached_text
+            metrics.record("extract", start, time.perf_counter() - started,
+                           _file_size(uploaded_file), cv=name)
+        elif _use_streaming(uploaded_file):
+            # Large uploads are streamed in this process rather than copied to a worker
+            with metrics.span("extract", size=_file_size(uploaded_file), cv=name) as span:
+                text = _extract_text_streaming(uploaded_file)
+                span.error = is_extraction_failure(text)
+            extracted.append((i, key, text))
+        else:
+            pending.append((i, key, uploaded_file, file_extension))
+
+    executor = _get_executor() if len(pending) > 1 else None
+    if executor is not None:
+        try:
+            futures = [(i, key, uploaded_file, executor.submit(_timed_extract, uploaded_file.getvalue(), file_extension))
+                       for i, key, uploaded_file, file_extension in pending]
+            results = [(i, key, uploaded_file, future.result())
+                       for i, key, uploaded_file, future in futures]
+        except Exception:
+            # Fall back to in-process extraction if the pool is unavailable
+            _reset_executor()
+        else:
+            for i, key, uploaded_file, (text, start, duration) in results:
+                metrics.record("extract", start, duration, _file_size(uploaded_file),
+                               is_extraction_failure(text), getattr(uploaded_file, "name", None))
+                extracted.append((i, key, text))
+            pending = []
+
+    for i, key, uploaded_file, file_extension in pending:
+        with metrics.span("extract", size=_file_size(uploaded_file),
+                          cv=getattr(uploaded_file, "name", None)) as span:
+            text = _extract_text_from_bytes(uploaded_file.getvalue(), file_extension, parallel=True)
+            span.error = is_extraction_failure(text)
+        extracted.append((i, key, text))
+
+    for i, key, text in extracted:
+        texts[i] = text
+        if not is_extraction_failure(text):
+            _set_cached_text(key, text)
+
+    return texts
+
+
 def extract_text_from_pdf(uploaded_file) -> str:
     """Extract text from PDF file."""
-    pdf_reader = pypdf.PdfReader(BytesIO(uploaded_file.getvalue()))
-    text = ""
-    for page_num in range(len(pdf_reader.pages)):
-        text += pdf_reader.pages[page_num].extract_text()
-
-    return text
+    if _use_streaming(uploaded_file):
+        return "".join(iter_text_pages(uploaded_file))
+    return _cap_text(_extract_pdf_bytes(uploaded_file.getvalue(), parallel=True))
 
 
 def extract_text_from_docx(uploaded_file) -> str:
     """Extract text from DOCX file."""
-    return docx2txt.process(BytesIO(uploaded_file.getvalue()))
+    import docx2txt
+
+    with _open_stream(uploaded_file) as stream:
+        return _cap_text(docx2txt.process(stream))
@@ -0,0 +1,102 @@
+"""
+Normalization of extracted CV text before it is sent for analysis.
+Collapses whitespace, rejoins words hyphenated across line breaks, drops
+page numbers and running headers/footers and caps the length, so payloads
+and backend token counts only carry the CV's content.
+"""
+
+import re
+from collections import Counter
+from typing import List, Tuple
+
+from config import CHAT_MAX_CHARS
+from services.text_extraction import PAGE_BREAK
+
+_SPACES = re.compile(r"[ \t\r\v\u00a0]+")
+_HYPHENATED = re.compile(r"([A-Za-z])-\n([a-z])")
+_BLANK_LINES = re.compile(r"\n{3,}")
+# Page numbers such as "3", "Page 3", "- 3 -" or "3 of 5"
+_PAGE_NUMBER = re.compile(r"^[-–—\s]*(?:page\s*)?(\d+)(?:\s*(?:of|/)\s*(\d+))?[-–—\s]*$",
+                          re.IGNORECASE)
+
+# Running headers and footers are looked for among this many lines at the top and bottom of each page
+_EDGE_LINES = 3
+# A header/footer must repeat on at least this many pages; two pages are too few to tell it from content
+_MIN_BOILERPLATE_PAGES = 3
+# Repeated lines longer than this are treated as content, not boilerplate
+_MAX_BOILERPLATE_CHARS = 100
+
+
+def _clean_page(page: str) -> List[str]:
+    """Collapse runs of spaces, rejoin hyphenated words and return the page's lines."""
+    lines = [_SPACES.sub(" ", line).strip() for line in page.splitlines()]
+    return _HYPHENATED.sub(r"\1\2", "\n".join(lines)).split("\n")
+
+
+def _edge_indices(lines: List[str]) -> Tuple[List[int], List[int]]:
+    """Indices of the first and last few non-empty lines of a page."""
+    non_empty = [i for i, line in enumerate(lines) if line]
+    return non_empty[:_EDGE_LINES], non_empty[-_EDGE_LINES:]
+
+
+def _is_page_number(line: str, number: int, page_count: int) -> bool:
+    match = _PAGE_NUMBER.match(line)
+    return (match is not None and int(match.group(1)) == number
+            and (match.group(2) is None or int(match.group(2)) == page_count))
+
+
+def _remove_boilerplate(pages: List[List[str]]) -> List[List[str]]:
+    """Drop page numbers and running headers/footers from the edges of each page.
+
+    A line is a running header (footer) if the same line is among the first (last)
+    few lines of more than half the pages, and of at least three. The first page keeps its copy, since a
+    running header is often the candidate's name; content away from the page
+    edges is never removed.
+    """
+    if len(pages) < 2:
+        return pages
+
+    edges = [_edge_indices(lines) for lines in pages]
+    repeated = []
+    for zone in range(2):
+        page_counts = Counter(key for lines, page_edges in zip(pages, edges)
+                              for key in {lines[i].lower() for i in page_edges[zone]})
+        repeated.append({key for key, count in page_counts.items()
+                         if count * 2 > len(pages) and count >= _MIN_BOILERPLATE_PAGES
+                         and len(key) <= _MAX_BOILERPLATE_CHARS})
+
+    cleaned = []
+    for number, (lines, page_edges) in enumerate(zip(pages, edges), start=1):
+        dropped = set()
+        for zone in range(2):
+            for i in page_edges[zone]:
+                if _is_page_number(lines[i], number, len(pages)):
+                    dropped.add(i)
+                elif number > 1 and lines[i].lower() in repeated[zone]:
+                    dropped.add(i)
+        cleaned.append([line for i, line in enumerate(lines) if i not in dropped])
+    return cleaned
+
+
+def normalize_pages(text: str, max_chars: int = CHAT_MAX_CHARS) -> List[str]:
+    """Split extracted text into normalized, non-empty pages, capped at ``max_chars`` in total (0 disables the cap)."""
+    pages = _remove_boilerplate([_clean_page(page) for page in text.split(PAGE_BREAK)])
+
+    normalized = []
+    remaining = max_chars if max_chars > 0 else None
+    for lines in pages:
+        page = _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+        if not page:
+            continue
+        if remaining is not None:
+            page = page[:remaining]
+            remaining -= len(page)
+        normalized.append(page)
+        if remaining == 0:
+            break
+    return normalized
+
+
+def normalize_cv_text(text: str, max_chars: int = CHAT_MAX_CHARS) -> str:
+    """Normalize extracted text into a single string with pages separated by blank lines."""
+    return "\n\n".join(normalize_pages(text, max_chars))
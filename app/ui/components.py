@@ -35,18 +35,24 @@ def display_feedback_buttons(result, index):
     with col1:
         if st.button("👍 Helpful", key=f"helpful_{index}"):
             feedback = APIClient.submit_feedback(
-                result["Message ID"],
-                result["Thread ID"],
+                result.message_id,
+                result.thread_id,
                 True
             )
-            st.success("Thank you for your feedback!")
+            if "error" in feedback:
+                st.error(f"API Error: {feedback['error']}")
+            else:
+                st.success("Thank you for your feedback!")
 
     with col2:
         if st.button("👎 Not Helpful", key=f"not_helpful_{index}"):
             feedback = APIClient.submit_feedback(
-                result["Message ID"],
-                result["Thread ID"],
+                result.message_id,
+                result.thread_id,
                 False
             )
-            st.success(
-                "Thank you for your feedback. We'll improve our analysis.")
+            if "error" in feedback:
+                st.error(f"API Error: {feedback['error']}")
+            else:
+                st.success(
+                    "Thank you for your feedback. We'll improve our analysis.")
@@ -2,156 +2,302 @@
 Main page UI logic for the CV Analysis Tool.
 """
 
+import math
+import threading
 import streamlit as st
-import json
-import time
-import pandas as pd
-from typing import List, Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
-from services import APIClient, extract_text_from_file, summarize_cv_analyses
+from cachetools import LRUCache
+
+from config import (
+    JOB_POLL_INTERVAL_SECONDS,
+    METRICS_ENABLED,
+    RESULTS_PAGE_SIZE,
+    RESULTS_RENDER_CACHE_SIZE
+)
+from services.analysis_model import CandidateAnalysis
+from services.metrics import metrics, run_context
+from services.results_store import (
+    ITEM_COMPLETED,
+    ITEM_FAILED,
+    ITEM_PENDING,
+    ITEM_SKIPPED,
+    get_results_store
+)
 from ui.components import display_feedback_buttons
 
+_STATUS_LABELS = {
+    ITEM_COMPLETED: "✅ Analyzed",
+    ITEM_FAILED: "❌ Failed",
+    ITEM_SKIPPED: "⏭️ Skipped",
+    ITEM_PENDING: "⏳ Pending"
+}
+
+# (run ID, position, version) -> (analysis, markdown); stored results only change
+# when a resumed run replaces them, which gives them a new version
+_rendered_results: LRUCache = LRUCache(maxsize=RESULTS_RENDER_CACHE_SIZE)
+_rendered_results_lock = threading.Lock()
+
+
+def process_cvs(uploaded_files) -> str:
+    """Submit uploaded CV files for analysis in the background and return the run ID."""
+    # The job queue and blob client load the API and storage SDKs, so import them on first use
+    from services.job_criteria import get_job_criteria_text, get_job_criteria_version
+    from services.job_queue import get_job_queue
 
-def process_cvs(uploaded_files) -> List[Dict[str, Any]]:
-    """Process uploaded CV files and send them to the API for analysis."""
-    results = []
+    # Cached analyses are only valid for the current job criteria
+    criteria_version = get_job_criteria_version()
 
-    with st.spinner("Analyzing CVs..."):
-        progress_bar = st.progress(0)
+    # The job keeps running on the shared worker pool across reruns of this script;
+    # the criteria text lets it analyze the best-matching CVs first
+    return get_job_queue().submit(uploaded_files, criteria_version=criteria_version,
+                                  criteria_text=get_job_criteria_text())
+
+
+def display_results(run_id: str):
+    """Display the stored analysis results of a run and its comparative summary."""
+    if not run_id:
+        return
 
-        for i, uploaded_file in enumerate(uploaded_files):
-            # Update progress
-            progress = (i + 1) / len(uploaded_files)
-            progress_bar.progress(progress)
+    from services.job_queue import ACTIVE_JOB_STATES, get_job_queue
 
-            # Extract text
-            cv_text = extract_text_from_file(uploaded_file)
+    job = get_job_queue().get_job(run_id)
+    if job is not None and job["status"] in ACTIVE_JOB_STATES:
+        display_job_progress(run_id)
+        return
 
-            # Send to API
-            identifier = f"cv_{i+1}"
-            response = APIClient.create_chat(
-                cv_text, identifier=identifier)
+    store = get_results_store()
+    total = store.count_results(run_id)
 
-            # Log the response for debugging if needed
-            if "error" in response:
-                st.error(
-                    f"Error analyzing {uploaded_file.name}: {response['error']}")
-                continue
+    if job is not None:
+        display_job_errors(job)
+        display_resume_button(run_id, job)
+    if not total:
+        return
 
-            # Store result
-            result = {
-                "CV Name": uploaded_file.name,
-                "Analysis": response.get("agent_response", "Analysis failed"),
-                "Thread ID": response.get("thread_id", ""),
-                "Message ID": response.get("message_id", "")
-            }
-            results.append(result)
+    st.header("Analysis Results")
 
-            # Simulate API delay to not overwhelm the server
-            time.sleep(0.5)
+    # Keep the summary in session state in step with the run being shown
+    if st.session_state.get('summary_run_id') != run_id:
+        st.session_state['summary_run_id'] = run_id
+        stored_summary = store.get_summary(run_id)
+        st.session_state['summary_generated'] = stored_summary is not None
+        if stored_summary is not None:
+            st.session_state['summary_content'] = stored_summary
+        else:
+            st.session_state.pop('summary_content', None)
 
-        # Reset summary state when processing new CVs
-        if 'summary_generated' in st.session_state:
-            st.session_state['summary_generated'] = False
-            if 'summary_content' in st.session_state:
-                del st.session_state['summary_content']
+    candidates_tab, summary_tab = st.tabs(["📋 Candidates", "🔍 Comparative Summary"])
+    with candidates_tab:
+        display_candidate_browser(run_id)
+    with summary_tab:
+        display_summary(run_id)
 
-    return results
+    display_performance_panel(run_id)
 
 
-def display_results(results: List[Dict[str, Any]]):
-    """Display the analysis results for the uploaded CVs."""
-    if not results:
+def display_performance_panel(run_id: str):
+    """Show the per-stage timings recorded for a run in this process, if any."""
+    breakdown = metrics.stage_breakdown(run_id)
+    if not METRICS_ENABLED or not breakdown:
         return
 
+    with st.expander("⏱️ Performance"):
+        st.dataframe(breakdown, hide_index=True, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Download Prometheus Metrics", metrics.prometheus_text(),
+                               file_name="cv_analysis_metrics.prom", mime="text/plain",
+                               key="download_metrics")
+        with col2:
+            st.download_button("Download Trace (JSON)", metrics.trace_json(run_id),
+                               file_name=f"cv_analysis_trace_{run_id}.json",
+                               mime="application/json", key="download_trace")
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL_SECONDS)
+def display_job_progress(run_id: str):
+    """Poll a background job and show its progress and the results stored so far."""
+    from services.job_queue import ACTIVE_JOB_STATES, get_job_queue
+
+    job = get_job_queue().get_job(run_id)
+    if job is None or job["status"] not in ACTIVE_JOB_STATES:
+        # Rerun the whole page once so the finished run is shown with its summary
+        st.rerun()
+
+    done = job["completed"] + job["failed"]
     st.header("Analysis Results")
+    st.progress(done / max(1, job["total"]),
+                text=f"Analyzing CVs... {done}/{job['total']} done")
+    display_job_errors(job)
+
+    if get_results_store().count_results(run_id):
+        display_candidate_browser(run_id)
+
+
+def display_job_errors(job: Dict[str, Any]):
+    """Show the errors recorded by a background job."""
+    for error in job["errors"]:
+        st.error(error)
+
+
+def display_resume_button(run_id: str, job: Dict[str, Any]):
+    """Offer to re-submit the CVs of a run that failed or never finished."""
+    unfinished = get_results_store().count_unfinished_items(run_id)
+    if not unfinished:
+        return
+
+    from services.job_criteria import get_job_criteria_version
+    from services.job_queue import JOB_INTERRUPTED, get_job_queue
+
+    if job["status"] == JOB_INTERRUPTED:
+        st.warning("This run was interrupted before all CVs were analyzed.")
+
+    if st.button(f"🔁 Resume Run ({unfinished} CVs remaining)", key="resume_run"):
+        # Only the failed and missing CVs are sent again; completed ones are kept
+        if get_job_queue().resume(run_id, criteria_version=get_job_criteria_version()):
+            st.session_state.pop('summary_run_id', None)
+        st.rerun()
+
+
+@st.fragment
+def display_candidate_browser(run_id: str):
+    """Display a compact index of a run's CVs and the full analysis of the selected one.
+
+    Only the index columns are read for every CV; the selected analysis is loaded
+    and cached on first display, so reruns cost the same for 10 CVs or 1,000.
+    """
+    index = get_results_store().get_result_index(run_id)
+    if not index:
+        return
+
+    sort_by = st.radio("Sort by", ["Upload order", "Overall score"], horizontal=True,
+                       key="results_sort")
+    if sort_by == "Overall score":
+        # Unscored and unfinished CVs go last, in upload order
+        index = sorted(index, key=lambda row: (row["overall_score"] is None,
+                                               -(row["overall_score"] or 0)))
+
+    page_count = math.ceil(len(index) / RESULTS_PAGE_SIZE)
+    page = 1
+    if page_count > 1:
+        page = st.number_input(
+            f"Page (of {page_count}, {len(index)} CVs)", min_value=1, max_value=page_count, value=1,
+            key="results_page")
+    rows = {row["position"]: row
+            for row in index[(page - 1) * RESULTS_PAGE_SIZE:page * RESULTS_PAGE_SIZE]}
+
+    st.dataframe(
+        [{"CV": row["cv_name"], "Overall Score": row["overall_score"], "Status": _status_label(row)}
+         for row in rows.values()],
+        hide_index=True, use_container_width=True)
+
+    position = st.selectbox("Candidate", list(rows),
+                            format_func=lambda position: rows[position]["cv_name"],
+                            key="results_candidate")
+    if position is None:
+        return
+    row = rows[position]
+
+    st.subheader(f"CV: {row['cv_name']}")
+    if row["status"] != ITEM_COMPLETED:
+        st.info(f"{_status_label(row)}: {row['error']}" if row["error"] else _status_label(row))
+        return
+
+    with run_context(run_id), metrics.span("render", size=1):
+        result, analysis = get_rendered_result(run_id, row)
+        if result is None:
+            return
+
+        if result.cached:
+            st.caption("⚡ Loaded from cache")
+        if len(result.source_files) > 1:
+            st.caption("📎 Also submitted as: " + ", ".join(result.source_files[1:]))
+
+        # Display the analysis parsed at ingest
+        st.markdown("### Analysis")
+        st.markdown(analysis)
+
+        display_feedback_buttons(result, position)
+
+
+def _status_label(row: Dict[str, Any]) -> str:
+    if row["status"] == ITEM_COMPLETED and row["cached"]:
+        return "⚡ Cached"
+    return _STATUS_LABELS.get(row["status"], row["status"])
 
-    # Create tabs for each CV and a summary tab
-    tab_names = [result["CV Name"]
-                 for result in results] + ["🔍 Comparative Summary"]
-    tabs = st.tabs(tab_names)
-
-    # Display individual CV tabs
-    # All tabs except the last one (summary)
-    for i, tab in enumerate(tabs[:-1]):
-        with tab:
-            result = results[i]
-
-            # CV name and metadata
-            st.subheader(f"CV: {result['CV Name']}")
-
-            # Analysis result
-            st.markdown("### Analysis")
-
-            # Parse and display the analysis
-            try:
-                analysis_data = json.loads(result["Analysis"])
-                for header in analysis_data:
-                    chat_dict = header.get('__dict__', {})
-                    chat_name = chat_dict.get('chat_name', '')
-
-                    if chat_name in ["summary"]:
-                        chat_response = chat_dict.get('chat_response', {})
-                        chat_message = chat_response.get('chat_message', {})
-                        content = chat_message.get(
-                            '__dict__', {}).get('content', '')
-
-                        if content:
-                            st.markdown(content)
-            except Exception as e:
-                st.error(f"Error displaying analysis: {str(e)}")
-                st.markdown(result["Analysis"])
-
-            # Display feedback buttons
-            display_feedback_buttons(result, i)
-
-    # Check if we need to automatically generate a new summary
-    if not st.session_state.get('summary_generated', False) or 'summary_content' not in st.session_state:
-        # Generate the summary automatically when results are first displayed
-        try:
+
+def get_rendered_result(run_id: str, row: Dict[str, Any]) -> Tuple[Optional[CandidateAnalysis], str]:
+    """Return a stored analysis and its markdown, reading the store only on first display."""
+    key = (run_id, row["position"], row["version"])
+    with _rendered_results_lock:
+        rendered = _rendered_results.get(key)
+    if rendered is not None:
+        return rendered
+
+    result = get_results_store().get_result(run_id, row["position"])
+    if result is None:
+        return None, ""
+    rendered = (result, result.summary_content)
+    with _rendered_results_lock:
+        _rendered_results[key] = rendered
+    return rendered
+
+
+def display_summary(run_id: str):
+    """Display the comparative summary of a run, generating it on first display."""
+    st.subheader("Comparative Summary of All CVs")
+
+    # Reserve the space above the button so the summary streams into place
+    summary_placeholder = st.empty()
+
+    # Provide button to regenerate if needed
+    regenerate = st.button("Regenerate Summary", key="regenerate_summary")
+
+    # Generate the summary automatically when results are first displayed
+    needs_summary = not st.session_state.get(
+        'summary_generated', False) or 'summary_content' not in st.session_state
+
+    if regenerate or needs_summary:
+        generate_summary(run_id, summary_placeholder,
+                         regenerate=regenerate)
+    else:
+        # Display the summary from session state
+        summary_placeholder.markdown(
+            st.session_state.get('summary_content', ''))
+
+
+def generate_summary(run_id: str, placeholder, regenerate: bool = False):
+    """Stream a comparative summary of a run into the placeholder and store it."""
+    # Check if OpenAI API credentials are configured
+    from config import AZURE_OPENAI_KEY, AZURE_OPENAI_ENDPOINT
+    from services.openai_client import stream_cv_summary
+    if not AZURE_OPENAI_KEY or not AZURE_OPENAI_ENDPOINT:
+        if regenerate:
+            st.error(
+                "Azure OpenAI API credentials not configured. Please add them to your .env file.")
+        st.session_state['summary_generated'] = False
+        st.session_state['summary_content'] = "⚠️ Azure OpenAI API credentials not configured. Please add them to your .env file to enable the comparative summary feature."
+        placeholder.markdown(st.session_state['summary_content'])
+        return
+
+    try:
+        with placeholder.container():
             with st.spinner("Generating comparative summary of all CVs..."):
-                # Check if OpenAI API credentials are configured
-                from config import AZURE_OPENAI_KEY, AZURE_OPENAI_ENDPOINT
-                if not AZURE_OPENAI_KEY or not AZURE_OPENAI_ENDPOINT:
-                    st.session_state['summary_generated'] = False
-                    st.session_state['summary_content'] = "⚠️ Azure OpenAI API credentials not configured. Please add them to your .env file to enable the comparative summary feature."
-                else:
-                    # Generate summary using Azure OpenAI
-                    summary = summarize_cv_analyses(results)
-
-                    # Store in session state
-                    st.session_state['summary_generated'] = True
-                    st.session_state['summary_content'] = summary
-        except Exception as e:
-            st.session_state['summary_generated'] = False
-            st.session_state[
-                'summary_content'] = f"⚠️ Error generating summary: {str(e)}. Please check your Azure OpenAI API credentials."
-
-    # Display summary tab
-    with tabs[-1]:
-        st.subheader("Comparative Summary of All CVs")
-
-        # Display the summary (either newly generated or from cache)
-        st.markdown(st.session_state.get('summary_content', ''))
-
-        # Provide button to regenerate if needed
-        if st.button("Regenerate Summary", key="regenerate_summary"):
-            with st.spinner("Regenerating comprehensive comparison..."):
-                try:
-                    # Check if OpenAI API credentials are configured
-                    from config import AZURE_OPENAI_KEY, AZURE_OPENAI_ENDPOINT
-                    if not AZURE_OPENAI_KEY or not AZURE_OPENAI_ENDPOINT:
-                        st.error(
-                            "Azure OpenAI API credentials not configured. Please add them to your .env file.")
-                    else:
-                        # Generate fresh summary using Azure OpenAI
-                        summary = summarize_cv_analyses(results)
-
-                        # Update session state
-                        st.session_state['summary_generated'] = True
-                        st.session_state['summary_content'] = summary
-
-                        # Refresh the UI
-                        st.rerun()
-                except Exception as e:
-                    st.error(f"Error generating summary: {str(e)}")
+                # Render tokens as they arrive; the full text is returned at the end
+                # The summary compares every candidate in the run, not just the current page
+                results = get_results_store().get_results(run_id)
+                with run_context(run_id):
+                    summary = st.write_stream(stream_cv_summary(results))
+
+        # Store in session state and with the run so it reloads without the API;
+        # stream_cv_summary raises on failure, so only complete summaries get here
+        st.session_state['summary_generated'] = True
+        st.session_state['summary_content'] = summary
+        get_results_store().save_summary(run_id, summary)
+    except Exception as e:
+        st.session_state['summary_generated'] = False
+        st.session_state[
+            'summary_content'] = f"⚠️ Error generating summary: {str(e)}. Please check your Azure OpenAI API credentials."
+        placeholder.markdown(st.session_state['summary_content'])
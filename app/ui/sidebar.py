@@ -3,11 +3,14 @@ Sidebar UI components for the CV Analysis Tool.
 """
 
 import streamlit as st
-import pandas as pd
 import json
+from datetime import datetime
 from typing import Dict, Any, Tuple, List, Optional
 
-from services import extract_text_from_file
+from config import RESULTS_RECENT_RUNS
+from services.analysis_model import export_rows
+from services.results_store import get_results_store
+from services.text_extraction import extract_text_from_file
 from utils.helpers import convert_text_to_job_criteria_json, update_job_criteria_in_azure
 
 
@@ -88,21 +91,67 @@ def render_sidebar():
     # Process button
     process_button = st.sidebar.button("Analyze CVs", type="primary")
 
+    # Reload a past run from the results store
+    render_past_runs()
+
     # Export results button
     if st.session_state.get('analysis_completed'):
-        export_results = st.sidebar.download_button(
-            label="Export Results as CSV",
-            data=pd.DataFrame(st.session_state.get(
-                'results', [])).to_csv(index=False),
-            file_name="cv_analysis_results.csv",
-            mime="text/csv"
-        )
-
-        # Add clear results button
+        render_export(st.session_state.get('run_id'))
+
+        # Add clear results button; the run stays in the results store
         if st.sidebar.button("Clear Results", type="secondary"):
             st.session_state['analysis_completed'] = False
-            st.session_state['results'] = []
-            st.session_state['thread_ids'] = []
+            st.session_state['run_id'] = None
             st.rerun()
 
     return uploaded_files, process_button
+
+
+def render_export(run_id: Optional[str]):
+    """Build the CSV export of a run when asked for, so reruns do not load every result."""
+    # The prepared CSV stays valid until the run gains results
+    export_key = (run_id, get_results_store().count_results(run_id))
+    if st.session_state.get('export_key') != export_key:
+        if not st.sidebar.button("Prepare CSV Export", key="prepare_export"):
+            return
+
+        # pandas is only needed once there are results to export
+        import pandas as pd
+
+        st.session_state['export_csv'] = pd.DataFrame(export_rows(
+            get_results_store().get_results(run_id))).to_csv(index=False)
+        st.session_state['export_key'] = export_key
+
+    st.sidebar.download_button(
+        label="Export Results as CSV",
+        data=st.session_state['export_csv'],
+        file_name="cv_analysis_results.csv",
+        mime="text/csv"
+    )
+
+
+def render_past_runs():
+    """Let the user reload the results of a previous run without calling the API."""
+    runs = [run for run in get_results_store().list_runs(RESULTS_RECENT_RUNS)
+            if run["total"]]
+    if not runs:
+        return
+
+    labels = {
+        run["run_id"]: f"{datetime.fromtimestamp(run['created_at']):%Y-%m-%d %H:%M} "
+                       f"({run['completed']}/{run['total']} CVs)"
+        for run in runs
+    }
+
+    st.sidebar.markdown("### 🗂️ Past Runs")
+    run_id = st.sidebar.selectbox(
+        "Previous analysis runs",
+        options=list(labels),
+        format_func=labels.get,
+        key="past_run"
+    )
+
+    if st.sidebar.button("Load Run", key="load_run"):
+        st.session_state['run_id'] = run_id
+        st.session_state['analysis_completed'] = True
+        st.rerun()
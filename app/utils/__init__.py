@@ -3,7 +3,10 @@ Utilities package for the CV Analysis Tool.
 Contains general helper functions.
 """
 
-from utils.helpers import convert_text_to_job_criteria_json, update_job_criteria_in_azure
+from utils.helpers import (
+    convert_text_to_job_criteria_json,
+    update_job_criteria_in_azure
+)
 
 __all__ = [
     'convert_text_to_job_criteria_json',
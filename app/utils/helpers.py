@@ -2,12 +2,10 @@
 General utility functions for the CV Analysis Tool.
 """
 
-import streamlit as st
-import json
-import os
+import logging
 from typing import Dict, Any
 
-from services.blob_storage import AzureBlobClient
+logger = logging.getLogger(__name__)
 
 
 def convert_text_to_job_criteria_json(text: str) -> Dict[str, Any]:
@@ -25,27 +23,14 @@ def convert_text_to_job_criteria_json(text: str) -> Dict[str, Any]:
 
 
 def update_job_criteria_in_azure(job_criteria: Dict[str, Any]) -> bool:
-    """Update job criteria using direct Azure SDK calls with the full URL."""
-    try:
-        import os
-        from azure.storage.blob import BlobClient
-
-        # Get the full URL
-        blob_url = os.getenv("AZURE_BLOB_STORAGE_URL", "")
-
-        st.info(f"Connecting to blob at: {blob_url.split('?')[0]}")
+    """Upload the job criteria to the blob named in AZURE_BLOB_STORAGE_URL."""
+    # Imported here so the Azure SDK only loads when criteria are actually uploaded
+    from services.job_criteria import get_job_criteria_cache
 
-        # Create a blob client
-        blob_client = BlobClient.from_blob_url(blob_url)
-
-        # Upload the content
-        job_criteria_json = json.dumps(job_criteria, indent=2)
-        blob_client.upload_blob(job_criteria_json, overwrite=True)
-
-        st.success("Job criteria updated successfully!")
+    try:
+        # Identical criteria are not uploaded again
+        get_job_criteria_cache().update(job_criteria)
         return True
-    except Exception as e:
-        st.error(f"Error updating job criteria: {str(e)}")
-        import traceback
-        st.error(f"Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.exception("Error updating job criteria")
         return False